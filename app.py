@@ -4,12 +4,23 @@ Flask web application for Val Thorens Snow Forecast
 """
 
 from flask import Flask, render_template_string, jsonify, send_from_directory, request
+from flask.json.provider import DefaultJSONProvider
 import os
 import json
-import requests
-from bs4 import BeautifulSoup
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+import http_client
+from forecast_extraction import extract_forecast_tables, STREAM_CHUNK_SIZE
+from forecast_columns import ForecastColumns, PERIOD_FIELDS, as_columns
 from snow_forecast_parser import SnowForecastParser
 from enhanced_snow_forecast_parser import EnhancedSnowForecastParser
+from forecast_cache import SingleFlight, ForecastCache, parse_ttl_overrides
+from precomputed_store import PrecomputedStore
+from published_data import ENCODINGS, write_atomic
+from refresh_scheduler import RefreshScheduler
+from refresh_jobs import JobQueue
+from prepared_responses import PreparedValues
+from data_plane import DataPlane
 
 # Try to import OpenWeather integration
 try:
@@ -19,11 +30,28 @@ except ImportError:
     OPENWEATHER_AVAILABLE = False
     print("⚠ OpenWeather integration not available")
 
+class ForecastJSONProvider(DefaultJSONProvider):
+    """Serializes columnar forecasts and forecast_model objects through their to_json()"""
+
+    @staticmethod
+    def default(o):
+        if hasattr(o, 'to_json'):
+            return o.to_json()
+        return DefaultJSONProvider.default(o)
+
 app = Flask(__name__)
+app.json = ForecastJSONProvider(app)
 
 # Get the directory where this script is located
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+VALID_RESORTS = ['Val-Thorens', 'Cervinia']
+VALID_ELEVATIONS = ['bot', 'mid', 'top']
+
+# Per-source deadlines (seconds) for building one /api/forecast response
+SNOW_FORECAST_DEADLINE = float(os.environ.get('SNOW_FORECAST_DEADLINE', '30'))
+OPENWEATHER_DEADLINE = float(os.environ.get('OPENWEATHER_DEADLINE', '10'))
+
 # Initialize OpenWeather API if available
 openweather_api = None
 if OPENWEATHER_AVAILABLE:
@@ -34,97 +62,252 @@ if OPENWEATHER_AVAILABLE:
     else:
         print("⚠ OPENWEATHER_API_KEY not set, using snow-forecast.com only")
 
+# OpenWeather calls run here, alongside the snow-forecast.com scrape
+openweather_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='openweather')
+
+# In-flight /api/forecast builds, keyed by (resort, elevation)
+forecast_flight = SingleFlight()
+
+# Built /api/forecast responses; expired entries are served while they refresh
+forecast_cache = ForecastCache(
+    maxsize=int(os.environ.get('FORECAST_CACHE_SIZE', '32')),
+    ttl=float(os.environ.get('FORECAST_CACHE_TTL', '900')),
+    ttl_overrides=parse_ttl_overrides(os.environ.get('FORECAST_CACHE_TTL_OVERRIDES')),
+    max_stale=float(os.environ.get('FORECAST_CACHE_MAX_STALE', '3600')),
+    flight=forecast_flight
+)
+
+# Every served file is held in memory and reloaded when it changes on disk
+data_plane = DataPlane(BASE_DIR)
+if os.environ.get('FORECAST_WATCH', '1') != '0':
+    data_plane.start(float(os.environ.get('FORECAST_WATCH_INTERVAL', '2')))
+
+# /api/refresh* run as background jobs; each file is scraped at most once per cooldown
+refresh_jobs = JobQueue(
+    workers=int(os.environ.get('FORECAST_REFRESH_WORKERS', '2')),
+    cooldown=float(os.environ.get('FORECAST_REFRESH_COOLDOWN', '60'))
+)
+
+# /api/forecasts resolves each requested resort/elevation pair on this pool
+batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('FORECAST_BATCH_WORKERS', str(len(VALID_RESORTS) * len(VALID_ELEVATIONS)))),
+    thread_name_prefix='forecast-batch'
+)
+BATCH_DEADLINE = float(os.environ.get('FORECAST_BATCH_DEADLINE', str(SNOW_FORECAST_DEADLINE + OPENWEATHER_DEADLINE)))
+
+# Serve the files written by generate_static_data.py while they are fresh enough
+READ_THROUGH = os.environ.get('FORECAST_READ_THROUGH', '1') != '0'
+precomputed_store = PrecomputedStore(
+    os.path.join(BASE_DIR, 'data'),
+    max_age=float(os.environ.get('FORECAST_STATIC_MAX_AGE', str(4 * 3600))),
+    data_plane=data_plane
+)
+
+# Validators for the JSON endpoints; clients revalidate after JSON_MAX_AGE seconds
+JSON_MAX_AGE = int(os.environ.get('FORECAST_JSON_MAX_AGE', '60'))
+JSON_CACHE_CONTROL = f"public, max-age={JSON_MAX_AGE}"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Response bodies are serialized and compressed once per content version
+prepared_values = PreparedValues(lambda value: app.json.dumps(value).encode('utf-8'))
+
+def accepted_encoding(available):
+    """Preferred Content-Encoding among available that the client accepts, or None for identity"""
+    for encoding in ENCODINGS:
+        if encoding in available and request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+def send_prepared(prepared, cache_control=JSON_CACHE_CONTROL, mimetype='application/json'):
+    """Send a PreparedBody in the best accepted encoding, or 304 if the client's copy matches"""
+    encoding = accepted_encoding(prepared.variants)
+    body, etag = prepared.encoded(encoding)
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    if prepared.variants:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def serve_json_file(name, missing_message):
+    """Serve a JSON file's bytes from the data plane, answering revalidations with 304"""
+    artifact = data_plane.get(name)
+    if artifact is None:
+        return jsonify({"error": missing_message}), 404
+    return send_prepared(artifact.prepared)
+
+def serve_forecast_page():
+    """Serve forecast.html from the data plane; browsers revalidate it on every load"""
+    artifact = data_plane.get('forecast.html')
+    if artifact is None:
+        return "Forecast page not found", 404
+    return send_prepared(artifact.prepared, 'no-cache', 'text/html')
+
 @app.route('/')
 def index():
     """Serve the main forecast page"""
-    html_path = os.path.join(BASE_DIR, 'forecast.html')
-    try:
-        with open(html_path, 'r') as f:
-            return f.read()
-    except FileNotFoundError:
-        return "Forecast page not found", 404
+    return serve_forecast_page()
 
 @app.route('/val_thorens_forecast.json')
 def get_forecast_json():
     """Serve the forecast JSON data"""
-    json_path = os.path.join(BASE_DIR, 'val_thorens_forecast.json')
-    try:
-        with open(json_path, 'r') as f:
-            data = json.load(f)
-        return jsonify(data)
-    except FileNotFoundError:
-        return jsonify({"error": "Forecast data not found"}), 404
+    return serve_json_file('val_thorens_forecast.json', "Forecast data not found")
+
+def refresh_file(name, fetch):
+    """Job body: fetch fresh forecast data and publish it as name in the app directory"""
+    forecast_data = fetch()
+    if not forecast_data:
+        raise RuntimeError("Failed to fetch forecast data")
+    body = json.dumps(forecast_data, indent=2, default=str).encode('utf-8')
+    write_atomic(os.path.join(BASE_DIR, name), body)
+    data_plane.reload()
+    return {"file": f"/{name}", "bytes": len(body)}
+
+def enqueue_refresh(name, fetch, message):
+    """Queue a refresh job, or join the one pending or just finished, and answer 202 with its status URL"""
+    job, created = refresh_jobs.submit(name, refresh_file, name, fetch)
+    if not created and job.finished_at is None:
+        message = "Refresh already in progress"
+    elif not created:
+        message = f"Refreshed at {job.finished_at}; next refresh allowed in {refresh_jobs.cooldown_left(job):.0f}s"
+    
+    status_url = f"/api/jobs/{job.id}"
+    response = jsonify({
+        "status": "accepted",
+        "message": message,
+        "job_id": job.id,
+        "status_url": status_url,
+        "deduplicated": not created
+    })
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
 
 @app.route('/api/refresh')
 def refresh_forecast():
-    """API endpoint to refresh basic forecast data"""
-    try:
-        parser = SnowForecastParser()
-        forecast_data = parser.get_forecast()
-        
-        if forecast_data:
-            # Save updated data
-            json_path = os.path.join(BASE_DIR, 'val_thorens_forecast.json')
-            with open(json_path, 'w') as f:
-                json.dump(forecast_data, f, indent=2, default=str)
-            
-            return jsonify({
-                "status": "success",
-                "message": "Basic forecast updated successfully",
-                "data": forecast_data
-            })
-        else:
-            return jsonify({
-                "status": "error",
-                "message": "Failed to fetch forecast data"
-            }), 500
-    
-    except Exception as e:
-        return jsonify({
-            "status": "error",
-            "message": f"Error updating forecast: {str(e)}"
-        }), 500
+    """API endpoint to queue a refresh of the basic forecast data"""
+    return enqueue_refresh('val_thorens_forecast.json', lambda: SnowForecastParser().get_forecast(),
+                           "Basic forecast refresh queued")
 
 @app.route('/api/refresh-comprehensive')
 def refresh_comprehensive_forecast():
-    """API endpoint to refresh comprehensive forecast data from all elevations"""
-    try:
-        parser = EnhancedSnowForecastParser()
-        forecast_data = parser.get_comprehensive_forecast()
-        
-        if forecast_data:
-            # Save updated data
-            json_path = os.path.join(BASE_DIR, 'comprehensive_val_thorens_forecast.json')
-            with open(json_path, 'w') as f:
-                json.dump(forecast_data, f, indent=2, default=str)
-            
-            return jsonify({
-                "status": "success",
-                "message": "Comprehensive forecast updated successfully",
-                "data": forecast_data
-            })
-        else:
-            return jsonify({
-                "status": "error",
-                "message": "Failed to fetch comprehensive forecast data"
-            }), 500
-    
-    except Exception as e:
-        return jsonify({
-            "status": "error",
-            "message": f"Error updating comprehensive forecast: {str(e)}"
-        }), 500
+    """API endpoint to queue a refresh of the comprehensive forecast data from all elevations"""
+    return enqueue_refresh('comprehensive_val_thorens_forecast.json',
+                           lambda: EnhancedSnowForecastParser().get_comprehensive_forecast(),
+                           "Comprehensive forecast refresh queued")
+
+@app.route('/api/jobs/<job_id>')
+def get_refresh_job(job_id):
+    """API endpoint reporting a queued refresh job's status"""
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    response = jsonify(job.to_json())
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
 @app.route('/comprehensive_val_thorens_forecast.json')
 def get_comprehensive_forecast_json():
     """Serve the comprehensive forecast JSON data"""
-    json_path = os.path.join(BASE_DIR, 'comprehensive_val_thorens_forecast.json')
+    return serve_json_file('comprehensive_val_thorens_forecast.json', "Comprehensive forecast data not found")
+
+def build_forecast(resort, elevation):
+    """Scrape snow-forecast.com and fetch OpenWeather concurrently, merging them into the day-by-day format
+
+    Returns None when the forecast table is missing from the page.
+    """
+    started = time.monotonic()
+    
+    # Start OpenWeather first so it runs while snow-forecast.com is scraped
+    ow_future = None
+    if openweather_api:
+        print(f"Fetching OpenWeather data for {resort} {elevation}...")
+        ow_future = openweather_executor.submit(openweather_api.get_forecast, resort=resort, elevation=elevation)
+    
+    response_data = scrape_forecast(resort, elevation)
+    if response_data is None or ow_future is None:
+        return response_data
+    
+    # Wait for OpenWeather only until its own deadline, then go with what we have
     try:
-        with open(json_path, 'r') as f:
-            data = json.load(f)
-        return jsonify(data)
-    except FileNotFoundError:
-        return jsonify({"error": "Comprehensive forecast data not found"}), 404
+        remaining = OPENWEATHER_DEADLINE - (time.monotonic() - started)
+        ow_data = ow_future.result(timeout=max(remaining, 0))
+        if ow_data:
+            response_data = compare_forecasts(response_data, ow_data)
+            response_data['sources'].append('OpenWeatherMap')
+            print(f"✓ Combined data from both sources")
+    except FutureTimeoutError:
+        print(f"⚠ OpenWeather missed its {OPENWEATHER_DEADLINE:g}s deadline, using snow-forecast.com only")
+    except Exception as e:
+        print(f"⚠ OpenWeather fetch failed: {e}")
+        # Continue with snow-forecast.com data only
+    
+    return response_data
+
+def read_until(chunks, deadline):
+    """Pass chunks through until the time.monotonic() deadline, then raise TimeoutError
+
+    The requests timeout only bounds each connect and read, so a page that
+    keeps trickling in would otherwise run past SNOW_FORECAST_DEADLINE.
+    """
+    for chunk in chunks:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"snow-forecast.com missed its {SNOW_FORECAST_DEADLINE:g}s deadline")
+        yield chunk
+
+def scrape_forecast(resort, elevation):
+    """Scrape snow-forecast.com into the day-by-day format, or None if the forecast table is missing"""
+    # Fetch fresh data from snow-forecast.com
+    url = f'https://www.snow-forecast.com/resorts/{resort}/6day/{elevation}'
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Cookie': 's_fid=browse'
+    }
+    
+    # Parse while downloading and hang up once both tables have arrived
+    deadline = time.monotonic() + SNOW_FORECAST_DEADLINE
+    response = http_client.get(url, headers=headers, timeout=SNOW_FORECAST_DEADLINE, stream=True)
+    try:
+        # Same extraction and day layout as the precomputed data/ files
+        table = extract_forecast_tables(read_until(response.iter_content(STREAM_CHUNK_SIZE), deadline))
+    finally:
+        response.close()
+    if not table:
+        return None
+    
+    # Build the response with snow-forecast.com data; day dicts are built when it is serialized
+    return {
+        'days': ForecastColumns.from_table(table),
+        'last_updated': None,
+        'sources': ['snow-forecast.com']
+    }
+
+# Optional background refresh so request threads never pay the scrape cost
+refresh_scheduler = None
+if os.environ.get('FORECAST_SCHEDULER') == '1':
+    refresh_scheduler = RefreshScheduler(
+        forecast_cache,
+        build_forecast,
+        [(resort, elevation) for resort in VALID_RESORTS for elevation in VALID_ELEVATIONS],
+        lead_time=float(os.environ.get('FORECAST_SCHEDULER_LEAD', '60')),
+        jitter=float(os.environ.get('FORECAST_SCHEDULER_JITTER', '30'))
+    )
+    refresh_scheduler.start()
+
+def resolve_forecast(resort, elevation):
+    """Day-by-day forecast for one resort elevation, or None if the forecast table is missing"""
+    # Prefer the precomputed file; fall back to a live scrape when it is stale or missing
+    response_data = precomputed_store.get_fresh(resort, elevation) if READ_THROUGH else None
+    if response_data is None:
+        # Served from cache when possible; concurrent misses share one upstream fetch and parse
+        response_data = forecast_cache.get_or_load((resort, elevation), build_forecast, resort, elevation)
+    return response_data
 
 @app.route('/api/forecast')
 def get_formatted_forecast():
@@ -135,156 +318,19 @@ def get_formatted_forecast():
         resort = request.args.get('resort', 'Val-Thorens')
         
         # Validate elevation
-        if elevation not in ['bot', 'mid', 'top']:
+        if elevation not in VALID_ELEVATIONS:
             elevation = 'bot'
         
         # Validate resort
-        valid_resorts = ['Val-Thorens', 'Cervinia']
-        if resort not in valid_resorts:
+        if resort not in VALID_RESORTS:
             resort = 'Val-Thorens'
         
-        # Fetch fresh data from snow-forecast.com
-        url = f'https://www.snow-forecast.com/resorts/{resort}/6day/{elevation}'
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Cookie': 's_fid=browse'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=30)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Find forecast table
-        forecast_table = soup.find('table', class_='forecast-table__table')
-        if not forecast_table:
+        response_data = resolve_forecast(resort, elevation)
+        if response_data is None:
             return jsonify({"error": "Forecast table not found"}), 404
         
-        # Extract all data rows
-        days_row = forecast_table.find('tr', {'data-row': 'days'})
-        time_row = forecast_table.find('tr', {'data-row': 'time'})
-        weather_row = forecast_table.find('tr', {'data-row': 'weather'})
-        temp_row = forecast_table.find('tr', {'data-row': 'temperature-max'})
-        snow_row = forecast_table.find('tr', {'data-row': 'snow'})
-        rain_row = forecast_table.find('tr', {'data-row': 'rain'})
-        wind_row = forecast_table.find('tr', {'data-row': 'wind'})
-        
-        # Parse days
-        day_cells = days_row.find_all('td', class_='forecast-table-days__cell')
-        days_info = []
-        for cell in day_cells:
-            day_name_elem = cell.find('div', class_='forecast-table-days__name')
-            day_date_elem = cell.find('div', class_='forecast-table-days__date')
-            if day_name_elem and day_date_elem:
-                days_info.append({
-                    'name': day_name_elem.get_text(strip=True),
-                    'date': day_date_elem.get_text(strip=True),
-                    'colspan': int(cell.get('colspan', '3'))
-                })
-        
-        # Parse times
-        time_cells = time_row.find_all('td', class_='forecast-table__cell')
-        times = [cell.get_text(strip=True) for cell in time_cells]
-        
-        # Parse weather conditions
-        weather_cells = weather_row.find_all('td', class_='forecast-table__cell')
-        conditions = []
-        for cell in weather_cells:
-            img = cell.find('img')
-            conditions.append(img.get('alt', 'Unknown') if img else 'N/A')
-        
-        # Parse temperatures
-        temp_cells = temp_row.find_all('td', class_='forecast-table__cell') if temp_row else []
-        temperatures = []
-        for cell in temp_cells:
-            # Look for div with class temp-value and data-value attribute
-            temp_div = cell.find('div', class_='temp-value')
-            if temp_div and temp_div.get('data-value'):
-                temp_val = temp_div.get('data-value')
-                temperatures.append(temp_val)
-            else:
-                temperatures.append('N/A')
-        
-        # Parse snow
-        snow_cells = snow_row.find_all('td', class_='forecast-table__cell') if snow_row else []
-        snow_amounts = []
-        for cell in snow_cells:
-            snow_span = cell.find('span', class_='snow-amount__value')
-            snow_amounts.append(snow_span.get_text(strip=True) if snow_span else '0')
-        
-        # Parse rain
-        rain_cells = rain_row.find_all('td', class_='forecast-table__cell') if rain_row else []
-        rain_amounts = []
-        for cell in rain_cells:
-            rain_span = cell.find('span', class_='rain-amount__value')
-            rain_amounts.append(rain_span.get_text(strip=True) if rain_span else '0')
-        
-        # Parse wind
-        wind_cells = wind_row.find_all('td', class_='forecast-table__cell') if wind_row else []
-        wind_data = []
-        for cell in wind_cells:
-            wind_speed_span = cell.find('span', class_='wind-icon__val')
-            wind_direction = cell.find('div', class_='wind-icon__tooltip')
-            if wind_speed_span:
-                speed = wind_speed_span.get_text(strip=True)
-                direction = wind_direction.get_text(strip=True) if wind_direction else 'N/A'
-                wind_data.append(f"{speed} km/h {direction}")
-            else:
-                wind_data.append('N/A')
-        
-        # Build day-by-day structure
-        forecast_days = []
-        cell_index = 0
-        
-        for day in days_info:
-            day_data = {
-                'name': day['name'],
-                'date': day['date'],
-                'am': None,
-                'pm': None,
-                'night': None
-            }
-            
-            # Get AM, PM, Night data
-            periods = ['am', 'pm', 'night']
-            for i in range(min(day['colspan'], 3)):
-                if cell_index >= len(times):
-                    break
-                
-                period_data = {
-                    'condition': conditions[cell_index] if cell_index < len(conditions) else 'N/A',
-                    'temperature': temperatures[cell_index] if cell_index < len(temperatures) else 'N/A',
-                    'snow': snow_amounts[cell_index] if cell_index < len(snow_amounts) else '0',
-                    'rain': rain_amounts[cell_index] if cell_index < len(rain_amounts) else '0',
-                    'wind': wind_data[cell_index] if cell_index < len(wind_data) else 'N/A'
-                }
-                
-                day_data[periods[i]] = period_data
-                cell_index += 1
-            
-            forecast_days.append(day_data)
-        
-        # Build the response with snow-forecast.com data
-        response_data = {
-            'days': forecast_days,
-            'last_updated': None,
-            'sources': ['snow-forecast.com']
-        }
-        
-        # Try to fetch and combine OpenWeather data if available
-        if openweather_api:
-            try:
-                print(f"Fetching OpenWeather data for {resort} {elevation}...")
-                ow_data = openweather_api.get_forecast(resort=resort, elevation=elevation)
-                if ow_data:
-                    response_data = compare_forecasts(response_data, ow_data)
-                    response_data['sources'].append('OpenWeatherMap')
-                    print(f"✓ Combined data from both sources")
-            except Exception as e:
-                print(f"⚠ OpenWeather fetch failed: {e}")
-                # Continue with snow-forecast.com data only
-        
-        return jsonify(response_data)
+        # Precomputed and cached forecasts stay the same object until they change
+        return send_prepared(prepared_values.get(response_data))
         
     except Exception as e:
         import traceback
@@ -292,30 +338,123 @@ def get_formatted_forecast():
         print(traceback.format_exc())
         return jsonify({"error": str(e)}), 500
 
+def list_arg(name, default):
+    """Values of a query parameter given repeated and/or comma-separated, in order without duplicates"""
+    values = []
+    for raw in request.args.getlist(name):
+        for value in raw.split(','):
+            value = value.strip()
+            if value and value not in values:
+                values.append(value)
+    return values or list(default)
+
+def project_forecast(data, fields):
+    """Copy of a forecast whose periods hold only the requested fields"""
+    projected = dict(data)
+    projected['days'] = as_columns(data.get('days', [])).projected_days(fields)
+    return projected
+
+@app.route('/api/forecasts')
+def get_batch_forecasts():
+    """API endpoint resolving several resorts and elevations concurrently into one response
+
+    ?resorts=Val-Thorens,Cervinia&elevations=bot,top&fields=snow,temperature; each
+    list defaults to everything, and fields limits what every period carries.
+    """
+    resorts = list_arg('resorts', VALID_RESORTS)
+    elevations = list_arg('elevations', VALID_ELEVATIONS)
+    fields = list_arg('fields', ()) or None
+    
+    invalid = {
+        'resorts': [value for value in resorts if value not in VALID_RESORTS],
+        'elevations': [value for value in elevations if value not in VALID_ELEVATIONS],
+        'fields': [value for value in fields or () if value not in PERIOD_FIELDS]
+    }
+    invalid = {name: values for name, values in invalid.items() if values}
+    if invalid:
+        return jsonify({
+            "error": "Unknown values requested",
+            "invalid": invalid,
+            "valid": {"resorts": VALID_RESORTS, "elevations": VALID_ELEVATIONS, "fields": list(PERIOD_FIELDS)}
+        }), 400
+    
+    # Every pair resolves at once; duplicate scrapes across requests are shared by forecast_cache
+    futures = {
+        batch_executor.submit(resolve_forecast, resort, elevation): (resort, elevation)
+        for resort in resorts for elevation in elevations
+    }
+    done, _ = wait(futures, timeout=BATCH_DEADLINE)
+    
+    forecasts, errors = {}, {}
+    for future, (resort, elevation) in futures.items():
+        if future not in done:
+            # Left running; its result still lands in forecast_cache for the next request
+            error = f"Missed the {BATCH_DEADLINE:g}s deadline"
+        elif future.exception() is not None:
+            error = str(future.exception())
+        elif future.result() is None:
+            error = "Forecast table not found"
+        else:
+            data = future.result()
+            forecasts.setdefault(resort, {})[elevation] = project_forecast(data, fields) if fields else data
+            continue
+        print(f"⚠ Batch forecast {resort} {elevation} failed: {error}")
+        errors.setdefault(resort, {})[elevation] = error
+    
+    response = jsonify({
+        "forecasts": forecasts,
+        "errors": errors,
+        "fields": fields
+    })
+    if not forecasts:
+        response.status_code = 502
+        return response
+    if errors:
+        # A partial answer must not be cached in place of the complete one
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    response.headers['Cache-Control'] = JSON_CACHE_CONTROL
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.route('/api/scheduler')
+def get_scheduler_state():
+    """API endpoint exposing the background refresh queue"""
+    if refresh_scheduler is None:
+        return jsonify({"running": False, "message": "Set FORECAST_SCHEDULER=1 to enable"})
+    return jsonify(refresh_scheduler.state())
+
 @app.route('/forecast.html')
 def forecast_page():
     """Serve the forecast HTML page"""
-    html_path = os.path.join(BASE_DIR, 'forecast.html')
-    try:
-        with open(html_path, 'r') as f:
-            return f.read()
-    except FileNotFoundError:
-        return "Forecast page not found", 404
+    return serve_forecast_page()
+
+@app.route('/data/<path:filename>')
+def get_published_data(filename):
+    """Serve a file published by generate_static_data.py, using its .br/.gz sibling when accepted"""
+    artifact = data_plane.get(f"data/{filename}")
+    if artifact is None:
+        return jsonify({"error": "Data file not found"}), 404
+    # Shard names change with their content, so a shard never needs revalidating
+    cache_control = IMMUTABLE_CACHE_CONTROL if filename.startswith('shards/') else JSON_CACHE_CONTROL
+    return send_prepared(artifact.prepared, cache_control)
 
 @app.route('/api/status')
 def get_status():
     """API endpoint to check service status"""
-    json_path = os.path.join(BASE_DIR, 'val_thorens_forecast.json')
-    file_exists = os.path.exists(json_path)
-    
-    last_modified = None
-    if file_exists:
-        last_modified = os.path.getmtime(json_path)
+    artifact = data_plane.get('val_thorens_forecast.json')
     
     return jsonify({
         "status": "online",
-        "forecast_available": file_exists,
-        "last_updated": last_modified
+        "forecast_available": artifact is not None,
+        "last_updated": artifact.mtime if artifact else None,
+        "http": http_client.connection_stats(),
+        "forecast_requests": forecast_flight.stats(),
+        "forecast_cache": forecast_cache.stats(),
+        "precomputed": precomputed_store.stats() if READ_THROUGH else None,
+        "data_plane": data_plane.stats(),
+        "prepared_responses": prepared_values.stats(),
+        "refresh_jobs": refresh_jobs.stats()
     })
 
 if __name__ == '__main__':
@@ -330,8 +469,8 @@ if __name__ == '__main__':
             parser = SnowForecastParser()
             forecast_data = parser.get_forecast()
             if forecast_data:
-                with open(json_path, 'w') as f:
-                    json.dump(forecast_data, f, indent=2, default=str)
+                write_atomic(json_path, json.dumps(forecast_data, indent=2, default=str).encode('utf-8'))
+                data_plane.reload()
                 print("Initial forecast data created")
         except Exception as e:
             print(f"Could not generate initial data: {e}")
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Benchmark the lxml extraction engine against the BeautifulSoup parser it replaced,
+in both full-document and partial (tables-only, streaming) modes
+
+Usage:
+    python benchmarks/bench_extraction.py [page.html ...] [--repeat N]
+
+Without page arguments the latest snapshot of every resort/elevation in the
+snapshot archive is used. Before timing, the partial parse must match the full
+one for every page, fed in chunks of CHECK_CHUNK_SIZES bytes, and for variants
+of each page with a look-alike table class and a nested table.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast_extraction import (  # noqa: E402
+    extract_forecast, extract_forecast_tables, parse_document, parse_tables, iter_chunks
+)
+from forecast_columns import build_days  # noqa: E402
+from snapshot_archive import SnapshotArchive  # noqa: E402
+
+
+# Chunk sizes the partial parse is checked at; None feeds the page in one piece
+CHECK_CHUNK_SIZES = (1, 7, 4096, None)
+
+
+def beautifulsoup_parse(html, resort='Val-Thorens', elevation='bot'):
+    """The html.parser/BeautifulSoup implementation that forecast_extraction replaced"""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Extract current snow conditions
+    snow_conditions = {}
+    snow_table = soup.find('table', class_='snow-depths-table__table')
+    if snow_table:
+        rows = snow_table.find_all('tr')
+        for row in rows:
+            header_cell = row.find('th')
+            value_cell = row.find('td')
+            if header_cell and value_cell:
+                key = header_cell.get_text(strip=True).replace(':', '')
+                value = value_cell.get_text(strip=True)
+                if key:
+                    snow_conditions[key] = value
+    
+    # Find forecast table
+    forecast_table = soup.find('table', class_='forecast-table__table')
+    if not forecast_table:
+        return None
+    
+    # Extract all data rows
+    days_row = forecast_table.find('tr', {'data-row': 'days'})
+    time_row = forecast_table.find('tr', {'data-row': 'time'})
+    weather_row = forecast_table.find('tr', {'data-row': 'weather'})
+    temp_row = forecast_table.find('tr', {'data-row': 'temperature-max'})
+    snow_row = forecast_table.find('tr', {'data-row': 'snow'})
+    rain_row = forecast_table.find('tr', {'data-row': 'rain'})
+    wind_row = forecast_table.find('tr', {'data-row': 'wind'})
+    
+    # Parse days
+    day_cells = days_row.find_all('td', class_='forecast-table-days__cell')
+    days_info = []
+    for cell in day_cells:
+        day_name_elem = cell.find('div', class_='forecast-table-days__name')
+        day_date_elem = cell.find('div', class_='forecast-table-days__date')
+        if day_name_elem and day_date_elem:
+            days_info.append({
+                'name': day_name_elem.text.strip(),
+                'date': day_date_elem.text.strip()
+            })
+    
+    # Parse time periods
+    time_cells = time_row.find_all('td')[1:]  # Skip first cell (label)
+    time_periods = [cell.text.strip() for cell in time_cells]
+    
+    # Parse weather conditions
+    weather_cells = weather_row.find_all('td', class_='forecast-table__cell')
+    weather_data = []
+    for cell in weather_cells:
+        # Try multiple methods to get weather condition
+        img = cell.find('img')
+        if img and img.has_attr('alt'):
+            weather_data.append(img['alt'])
+        else:
+            condition_elem = cell.find('div', class_='weather-icon')
+            condition = condition_elem.get('title', '') if condition_elem else ''
+            weather_data.append(condition)
+    
+    # Parse temperatures
+    temp_cells = temp_row.find_all('td', class_='forecast-table__cell')
+    temp_data = []
+    for cell in temp_cells:
+        temp_elem = cell.find('div', class_='temp-value')
+        if temp_elem and temp_elem.has_attr('data-value'):
+            temp_data.append(temp_elem['data-value'])
+        else:
+            temp_data.append(None)
+    
+    # Parse snow
+    snow_cells = snow_row.find_all('td', class_='forecast-table__cell')
+    snow_data = []
+    for cell in snow_cells:
+        snow_val = cell.find('span', class_='snow-amount__value')
+        if snow_val:
+            snow_data.append(snow_val.text.strip())
+        else:
+            snow_data.append('0')
+    
+    # Parse rain
+    rain_cells = rain_row.find_all('td', class_='forecast-table__cell')
+    rain_data = []
+    for cell in rain_cells:
+        rain_val = cell.find('span', class_='rain-amount__value')
+        if rain_val:
+            rain_data.append(rain_val.text.strip())
+        else:
+            rain_data.append('0')
+    
+    # Parse wind
+    wind_cells = wind_row.find_all('td', class_='forecast-table__cell')
+    wind_data = []
+    for cell in wind_cells:
+        wind_icon = cell.find('div', class_='wind-icon')
+        if wind_icon and wind_icon.has_attr('data-speed'):
+            speed = wind_icon['data-speed']
+            # Get wind direction from rotation
+            arrow = wind_icon.find('g', class_='wind-icon__arrow')
+            direction = ''
+            if arrow and arrow.has_attr('transform'):
+                transform = arrow['transform']
+                # Extract rotation angle and convert to direction
+                match = re.search(r'rotate\((\d+)\)', transform)
+                if match:
+                    angle = int(match.group(1))
+                    # Convert angle to compass direction
+                    directions = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
+                    idx = round(angle / 45) % 8
+                    direction = directions[idx]
+            wind_str = f"{speed} km/h"
+            if direction:
+                wind_str += f" {direction}"
+            wind_data.append(wind_str)
+        else:
+            wind_data.append('')
+    
+    # Organize data by days
+    days = []
+    cell_idx = 0
+    for day_info in days_info:
+        day_data = {
+            'name': day_info['name'],
+            'date': day_info['date'],
+            'am': None,
+            'pm': None,
+            'night': None
+        }
+        
+        # Each day has 3 periods: AM, PM, night
+        for period in ['am', 'pm', 'night']:
+            if cell_idx < len(time_periods):
+                day_data[period] = {
+                    'condition': weather_data[cell_idx] if cell_idx < len(weather_data) else '',
+                    'temperature': temp_data[cell_idx] if cell_idx < len(temp_data) else None,
+                    'snow': snow_data[cell_idx] if cell_idx < len(snow_data) else '0',
+                    'rain': rain_data[cell_idx] if cell_idx < len(rain_data) else '0',
+                    'wind': wind_data[cell_idx] if cell_idx < len(wind_data) else ''
+                }
+                cell_idx += 1
+        
+        days.append(day_data)
+    
+    result = {
+        'days': days,
+        'last_updated': datetime.now().isoformat(),
+        'resort': resort,
+        'elevation': elevation
+    }
+    
+    # Add snow conditions if available
+    if snow_conditions:
+        result['snow_conditions'] = snow_conditions
+    
+    return result
+
+
+def lxml_parse(html):
+    table = extract_forecast(html)
+    return build_days(table) if table else None
+
+
+def partial_parse(html):
+    table = extract_forecast_tables(html)
+    return build_days(table) if table else None
+
+
+def page_variants(name, html):
+    """(name, page) pairs: the page, plus edits that the tag scan must not be fooled by"""
+    body = html.encode('utf-8') if isinstance(html, str) else html
+    variants = [(name, html)]
+    table = body.find(b'forecast-table__table')
+    start = body.rfind(b'<table', 0, table)
+    if start >= 0:
+        # A table whose class merely starts with a target's name, ahead of the real one
+        decoy = b'<table class="forecast-table__table--sticky"><tr data-row="days"><td>decoy</td></tr></table>'
+        variants.append((f"{name} (look-alike class)", body[:start] + decoy + body[start:]))
+    cell_end = body.find(b'</td>', body.find(b'data-row="days"', max(start, 0)))
+    if start >= 0 and cell_end >= 0:
+        # A table nested in a target table: its first closing tag is not the target's
+        inner = b'<table class="inner"><tr><td>nested</td></tr></table>'
+        variants.append((f"{name} (nested table)", body[:cell_end] + inner + body[cell_end:]))
+    return variants
+
+
+def check_partial(name, html):
+    """Messages for each chunk size at which the partial parse differs from the full one"""
+    def comparable(table):
+        return {key: value for key, value in table.items() if key != 'summaries'} if table else table
+
+    expected = comparable(extract_forecast(html))
+    failures = []
+    for size in CHECK_CHUNK_SIZES:
+        chunks = iter_chunks(html, size or max(len(html), 1))
+        if comparable(extract_forecast_tables(chunks)) != expected:
+            failures.append(f"{name}: partial parse differs from the full parse "
+                            f"{f'in {size}-byte chunks' if size else 'fed in one piece'}")
+    return failures
+
+
+def count_elements(root):
+    return sum(1 for _ in root.iter()) if root is not None else 0
+
+
+def load_pages(paths):
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                pages.append((os.path.basename(path), f.read()))
+        return pages
+
+    archive = SnapshotArchive()
+    latest = {}
+    for entry in archive.snapshots():
+        latest[(entry['resort'], entry['elevation'])] = entry
+    return [(f"{resort}-{elevation}", archive.read(entry['sha256']))
+            for (resort, elevation), entry in sorted(latest.items())]
+
+
+def time_parser(parse, pages, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _, html in pages:
+            parse(html)
+    return (time.perf_counter() - started) / (repeat * len(pages))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pages', nargs='*', help="HTML files to parse (default: latest archived snapshots)")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    pages = load_pages(args.pages)
+    if not pages:
+        print("No pages to benchmark; pass HTML files or run generate_static_data.py first")
+        return 1
+
+    # Both parsers must agree before their speed means anything
+    for name, html in pages:
+        legacy = beautifulsoup_parse(html)
+        if (legacy and legacy['days']) != lxml_parse(html):
+            print(f"✗ {name}: lxml output differs from the BeautifulSoup parser")
+            return 1
+        failures = [message for variant, page in page_variants(name, html) for message in check_partial(variant, page)]
+        for message in failures:
+            print(f"✗ {message}")
+        if failures:
+            return 1
+
+    print(f"✓ Partial parse matches the full parse at chunk sizes "
+          f"{', '.join(str(size or 'whole page') for size in CHECK_CHUNK_SIZES)}")
+
+    megabytes = sum(len(html) for _, html in pages) / 1e6
+    legacy_seconds = time_parser(beautifulsoup_parse, pages, args.repeat)
+    lxml_seconds = time_parser(lxml_parse, pages, args.repeat)
+    partial_seconds = time_parser(partial_parse, pages, args.repeat)
+    full_parse_seconds = time_parser(parse_document, pages, args.repeat)
+    tables_parse_seconds = time_parser(lambda html: parse_tables(iter_chunks(html)), pages, args.repeat)
+    full_elements = sum(count_elements(parse_document(html)) for _, html in pages) / len(pages)
+    partial_elements = sum(count_elements(parse_tables(iter_chunks(html))) for _, html in pages) / len(pages)
+
+    print(f"{len(pages)} pages, {megabytes:.2f} MB, {args.repeat} rounds")
+    print(f"  BeautifulSoup/html.parser: {legacy_seconds * 1000:8.2f} ms/page")
+    print(f"  lxml/XPath:                {lxml_seconds * 1000:8.2f} ms/page")
+    print(f"  lxml/XPath, tables only:   {partial_seconds * 1000:8.2f} ms/page")
+    print(f"  speedup:                   {legacy_seconds / lxml_seconds:8.1f}x full, "
+          f"{legacy_seconds / partial_seconds:.1f}x tables only")
+    print(f"  tree building alone:       {full_parse_seconds * 1000:8.2f} ms/page full, "
+          f"{tables_parse_seconds * 1000:.2f} ms/page tables only")
+    print(f"  elements parsed per page:  {full_elements:8.0f} full, {partial_elements:.0f} tables only")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Parser benchmark and regression suite over the fixtures in fixtures/
+
+Usage:
+    python benchmarks/bench_parsers.py [--repeat N] [--output FILE] [--baseline FILE]
+                                       [--tolerance FRACTION] [--write-baseline]
+                                       [--require-recorded]
+
+Checks every fixture against its expected output, then times each stage per
+call and per MB of fixture input, and writes the results as JSON. Each run
+also times a fixed calibration workload after every call (lxml parsing and pure-Python JSON
+work that does not touch this repo's code), and stages are compared with the
+baseline relative to it, so a faster or slower machine does not count as a
+change. The run fails (exit status 1) when an output differs from the
+expected one or a stage's cost relative to the calibration workload is more
+than --tolerance above the stored baseline's.
+Record fixtures with record_fixtures.py. The run warns when any page fixture is
+synthetic rather than a live or archived recording, and fails on it with
+--require-recorded, which is what a regression gate should run with.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+from lxml import html as lxml_html
+
+from parser_fixtures import load_fixtures, run_pipeline, use_utc, parse_forecast
+from openweather_integration import OpenWeatherAPI, compare_forecasts
+from snow_forecast_parser import SnowForecastParser
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+RESULTS_PATH = os.path.join(BENCH_DIR, 'results', 'parsers.json')
+MIN_BATCH_SECONDS = 0.002
+
+
+# Fixed input for the calibration workload: a table page and the records read from it
+CALIBRATION_PAGE = '<html><body><table>' + ''.join(
+    f'<tr data-row="r{row}">' + ''.join(f'<td class="cell"><span>{row * col % 97}</span></td>' for col in range(30)) + '</tr>'
+    for row in range(10)
+) + '</table></body></html>'
+
+
+def calibration_workload():
+    """Parse CALIBRATION_PAGE and round-trip its cells through JSON"""
+    root = lxml_html.fromstring(CALIBRATION_PAGE)
+    records = [{'row': cell.getparent().get('data-row'), 'value': float(cell.text_content())}
+               for cell in root.iter('td')]
+    return json.loads(json.dumps(records))
+
+
+def check_outputs(fixtures):
+    """Names of the fixture stages whose output no longer matches the expected one"""
+    failures = []
+    for fixture in fixtures:
+        if fixture['expected'] is None:
+            failures.append(f"{fixture['name']}: no expected output recorded")
+            continue
+        expected = json.loads(fixture['expected'])
+        actual = run_pipeline(fixture)
+        for stage in expected:
+            if actual.get(stage) != expected[stage]:
+                failures.append(f"{fixture['name']}: {stage} output differs from the expected output")
+    return failures
+
+
+def stages(fixtures):
+    """(name, [(call, input bytes)]) for every benchmarked stage"""
+    openweather = OpenWeatherAPI('fixture')
+    snow_forecast_parser = SnowForecastParser()
+    parse_calls, legacy_calls, format_calls, compare_calls = [], [], [], []
+    for fixture in fixtures:
+        html, resort, elevation = fixture['html'], fixture['resort'], fixture['elevation']
+        parse_calls.append((lambda h=html, r=resort, e=elevation: parse_forecast(h, r, e), len(html)))
+        legacy_calls.append((lambda h=html: snow_forecast_parser.parse_forecast_data(h), len(html)))
+        if not fixture['openweather']:
+            continue
+        raw = json.loads(fixture['openweather'])
+        size = len(fixture['openweather'])
+        format_calls.append((lambda d=raw, r=resort, e=elevation: openweather._format_forecast(d, r, e), size))
+        parsed = parse_forecast(html, resort, elevation)
+        formatted = openweather._format_forecast(raw, resort, elevation)
+        compare_calls.append((lambda p=parsed, f=formatted: compare_forecasts(p, f), size))
+    return [
+        ('fetch_forecast.parse_forecast', parse_calls),
+        ('SnowForecastParser.parse_forecast_data', legacy_calls),
+        ('OpenWeatherAPI._format_forecast', format_calls),
+        ('compare_forecasts', compare_calls)
+    ]
+
+
+def time_stage(calls, repeat):
+    """Per-call timings of one stage: median and mean milliseconds, and milliseconds per MB of input
+
+    The calibration workload runs right after every timed batch, and
+    relative_cost is the median of each batch's time over the calibration
+    run that followed it, so it compares like with like even while the
+    machine's speed drifts during the run. Calls too quick to time on their
+    own are repeated in batches of at least MIN_BATCH_SECONDS.
+    """
+    batches = [max(1, int(MIN_BATCH_SECONDS / max(_elapsed(call), 1e-7))) for call, _ in calls]
+    durations, calibration, ratios = [], [], []
+    for _ in range(repeat):
+        for (call, _), batch in zip(calls, batches):
+            per_call = _elapsed(call, batch) / batch
+            calibrated = _elapsed(calibration_workload)
+            durations.append(per_call)
+            calibration.append(calibrated)
+            ratios.append(per_call / calibrated)
+    megabytes = sum(size for _, size in calls) * repeat / 1e6
+    return {
+        'calls': len(durations),
+        'bytes_per_call': round(sum(size for _, size in calls) / len(calls)),
+        'ms_per_call': round(statistics.median(durations) * 1000, 4),
+        'mean_ms_per_call': round(statistics.fmean(durations) * 1000, 4),
+        'ms_per_mb': round(sum(durations) * 1000 / megabytes, 2),
+        'calibration_ms_per_call': round(statistics.median(calibration) * 1000, 4),
+        'relative_cost': round(statistics.median(ratios), 6)
+    }
+
+
+def _elapsed(call, times=1):
+    started = time.perf_counter()
+    for _ in range(times):
+        call()
+    return time.perf_counter() - started
+
+
+def find_regressions(results, baseline, tolerance):
+    """Stages whose cost relative to the calibration workload grew by more than tolerance"""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline['benchmarks'].get(name)
+        if not expected or 'relative_cost' not in expected:
+            continue
+        limit = expected['relative_cost'] * (1 + tolerance)
+        if result['relative_cost'] > limit:
+            regressions.append(f"{name}: {result['relative_cost']:.3f}x the calibration workload vs baseline "
+                               f"{expected['relative_cost']:.3f}x (limit {limit:.3f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', default=RESULTS_PATH, help="where to write the JSON results")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help="allowed slowdown per call over the baseline, as a fraction (default 0.3)")
+    parser.add_argument('--write-baseline', action='store_true', help="store this run as the new baseline")
+    parser.add_argument('--require-recorded', action='store_true',
+                        help="fail unless every page fixture is a live or archived recording")
+    args = parser.parse_args(argv)
+
+    use_utc()
+    fixtures = load_fixtures()
+    if not fixtures:
+        print("No fixtures found; record them with benchmarks/record_fixtures.py")
+        return 1
+
+    sources = {}
+    for fixture in fixtures:
+        sources[fixture['source'] or 'unknown'] = sources.get(fixture['source'] or 'unknown', 0) + 1
+
+    failures = check_outputs(fixtures)
+    results = {}
+    for name, calls in stages(fixtures):
+        if calls:
+            results[name] = time_stage(calls, args.repeat)
+
+    try:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {'benchmarks': {}}
+    regressions = [] if args.write_baseline else find_regressions(results, baseline, args.tolerance)
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'fixtures': len(fixtures),
+        'fixture_sources': sources,
+        'repeat': args.repeat,
+        'tolerance': args.tolerance,
+        'benchmarks': results,
+        'output_mismatches': failures,
+        'regressions': regressions
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    if args.write_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({key: report[key] for key in ('generated_at', 'python', 'machine', 'benchmarks')}, f, indent=2)
+            f.write('\n')
+        print(f"✓ Baseline written to {args.baseline}")
+
+    print(f"{len(fixtures)} fixtures ({', '.join(f'{count} {source}' for source, count in sorted(sources.items()))}), "
+          f"{args.repeat} rounds")
+    unrecorded = sorted(fixture['name'] for fixture in fixtures if fixture['source'] not in ('live', 'archive'))
+    if unrecorded:
+        print(f"{'✗' if args.require_recorded else '⚠'} {len(unrecorded)} pages are not recordings of "
+              "snow-forecast.com, so output checks on them only show the parsers agree with themselves; "
+              "re-record with record_fixtures.py --source live|archive")
+    for name, result in results.items():
+        print(f"  {name:<40} {result['ms_per_call']:8.3f} ms/call {result['ms_per_mb']:10.1f} ms/MB "
+              f"{result['relative_cost']:8.3f}x calibration")
+    for message in failures + regressions:
+        print(f"✗ {message}")
+    print(f"✓ Results written to {args.output}")
+    return 1 if failures or regressions or (args.require_recorded and unrecorded) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
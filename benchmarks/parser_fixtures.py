@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Recorded parser fixtures shared by record_fixtures.py and bench_parsers.py
+
+Layout under benchmarks/fixtures/:
+    snow-forecast/<resort>-<elevation>.html   snow-forecast.com 6-day page
+    openweather/<resort>-<elevation>.json     raw OpenWeather 3-hour forecast for the same place
+    expected/<resort>-<elevation>.json        pipeline output the fixtures must keep producing
+    manifest.json                             where and when each fixture was recorded
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast_columns import json_default  # noqa: E402
+from generate_static_data import RESORTS, parse_forecast  # noqa: E402
+from openweather_integration import OpenWeatherAPI, compare_forecasts  # noqa: E402
+from snow_forecast_parser import SnowForecastParser  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def fixture_name(resort, elevation):
+    return f"{resort.lower()}-{elevation}"
+
+
+def fixture_path(kind, resort, elevation, root=FIXTURES_DIR):
+    extension = '.html' if kind == 'snow-forecast' else '.json'
+    return os.path.join(root, kind, fixture_name(resort, elevation) + extension)
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def use_utc():
+    """Pin the local timezone: _format_forecast groups 3-hour entries by local date"""
+    os.environ['TZ'] = 'UTC'
+    if hasattr(time, 'tzset'):
+        time.tzset()
+
+
+def load_manifest(root=FIXTURES_DIR):
+    try:
+        with open(os.path.join(root, 'manifest.json'), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def load_fixtures(root=FIXTURES_DIR):
+    """Every resort/elevation with a recorded page, as dicts of raw fixture bytes
+
+    'source' is where the page came from according to the manifest: live,
+    archive or synthetic (None when the manifest does not say).
+    """
+    manifest = load_manifest(root)
+    fixtures = []
+    for resort, elevations in RESORTS.items():
+        for elevation in elevations:
+            html = _read(fixture_path('snow-forecast', resort, elevation, root))
+            if html is None:
+                continue
+            name = fixture_name(resort, elevation)
+            fixtures.append({
+                'name': name,
+                'source': manifest.get(name, {}).get('snow-forecast', {}).get('source'),
+                'resort': resort,
+                'elevation': elevation,
+                'html': html,
+                'openweather': _read(fixture_path('openweather', resort, elevation, root)),
+                'expected': _read(fixture_path('expected', resort, elevation, root))
+            })
+    return fixtures
+
+
+def normalize(value):
+    """JSON-equivalent form of an output with the run-dependent last_updated stamps removed"""
+    def strip(item):
+        if isinstance(item, dict):
+            return {key: strip(child) for key, child in item.items() if key != 'last_updated'}
+        if isinstance(item, list):
+            return [strip(child) for child in item]
+        return item
+    return strip(json.loads(json.dumps(value, default=json_default)))
+
+
+def run_pipeline(fixture):
+    """Outputs of every benchmarked stage for one fixture, normalized for comparison"""
+    resort, elevation = fixture['resort'], fixture['elevation']
+    parsed = parse_forecast(fixture['html'], resort, elevation)
+    outputs = {
+        'parse_forecast': parsed,
+        'snow_forecast_parser': SnowForecastParser().parse_forecast_data(fixture['html']),
+        'openweather': None,
+        'compare_forecasts': None
+    }
+    if fixture['openweather']:
+        openweather = OpenWeatherAPI('fixture')._format_forecast(json.loads(fixture['openweather']), resort, elevation)
+        outputs['openweather'] = openweather
+        if parsed:
+            outputs['compare_forecasts'] = compare_forecasts(parsed, openweather)
+    return normalize(outputs)
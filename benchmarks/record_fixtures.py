@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Record the parser fixtures used by bench_parsers.py
+
+Usage:
+    python benchmarks/record_fixtures.py [--source live|archive|synthetic] [--expected-only]
+
+Sources:
+    live       snow-forecast.com pages and raw OpenWeather responses (OpenWeather
+               needs OPENWEATHER_API_KEY; without it existing OpenWeather fixtures are kept)
+    archive    latest snapshot of each page from the snapshot archive
+    synthetic  pages rendered from data/*.json in snow-forecast.com's table markup,
+               with seeded OpenWeather responses, for recording offline. These only
+               check the parsers against themselves: they cannot catch a change in
+               snow-forecast.com's real markup, so replace them with live or archive
+               recordings as soon as one can be made
+
+Expected outputs are always regenerated from the current code afterwards, so
+record only when the current parsers are known to be correct.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from parser_fixtures import (
+    FIXTURES_DIR, RESORTS, fixture_name, fixture_path, load_fixtures, load_manifest, run_pipeline, use_utc
+)
+from generate_static_data import fetch_forecast_page
+from openweather_integration import OpenWeatherAPI
+from snapshot_archive import SnapshotArchive
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+COMPASS_DEGREES = {'N': 0, 'NE': 45, 'E': 90, 'SE': 135, 'S': 180, 'SW': 225, 'W': 270, 'NW': 315}
+PERIODS = ('am', 'pm', 'night')
+TIME_LABELS = {'am': 'AM', 'pm': 'PM', 'night': 'night'}
+
+
+def _write(path, body):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(body)
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _cell(content):
+    return f'<td class="forecast-table__cell">{content}</td>'
+
+
+def synthesize_page(forecast):
+    """Render a published forecast back into snow-forecast.com's 6-day page markup"""
+    days = forecast['days']
+    cells = [(day, day[period], period) for day in days for period in PERIODS if day.get(period)]
+    esc = html.escape
+
+    rows = ['<tr data-row="days"><td class="forecast-table__header">Day</td>' + ''.join(
+        f'<td class="forecast-table-days__cell" colspan="{sum(1 for p in PERIODS if day.get(p))}">'
+        f'<div class="forecast-table-days__name">{esc(day["name"])}</div>'
+        f'<div class="forecast-table-days__date">{esc(day["date"])}</div></td>'
+        for day in days) + '</tr>']
+    rows.append('<tr data-row="time"><td class="forecast-table__header">Time</td>'
+                + ''.join(_cell(TIME_LABELS[period]) for _, _, period in cells) + '</tr>')
+    rows.append('<tr data-row="weather"><td class="forecast-table__header">Weather</td>' + ''.join(
+        _cell(f'<img alt="{esc(values["condition"])}" src="/images/wx/{esc(values["condition"]).replace(" ", "")}.gif">')
+        for _, values, _ in cells) + '</tr>')
+    rows.append('<tr data-row="temperature-max"><td class="forecast-table__header">High</td>' + ''.join(
+        _cell(f'<div class="temp-value" data-value="{values["temperature"]}">{values["temperature"]}</div>')
+        for _, values, _ in cells) + '</tr>')
+    rows.append('<tr data-row="snow"><td class="forecast-table__header">Snow</td>' + ''.join(
+        _cell(f'<div class="snow-amount"><span class="snow-amount__value">{values["snow"]}</span></div>'
+              if values['snow'] != '0' else '<div class="snow-amount">—</div>')
+        for _, values, _ in cells) + '</tr>')
+    rows.append('<tr data-row="rain"><td class="forecast-table__header">Rain</td>' + ''.join(
+        _cell(f'<div class="rain-amount"><span class="rain-amount__value">{values["rain"]}</span></div>'
+              if values['rain'] != '0' else '<div class="rain-amount">—</div>')
+        for _, values, _ in cells) + '</tr>')
+
+    wind_cells = []
+    for _, values, _ in cells:
+        speed, _, direction = values['wind'].partition(' km/h ')
+        wind_cells.append(_cell(
+            f'<div class="wind-icon" data-speed="{speed}"><svg><g class="wind-icon__arrow" '
+            f'transform="rotate({COMPASS_DEGREES.get(direction, 0)})"></g></svg>'
+            f'<span class="wind-icon__val">{speed}</span><div class="wind-icon__tooltip">{direction}</div></div>'))
+    rows.append('<tr data-row="wind"><td class="forecast-table__header">Wind</td>' + ''.join(wind_cells) + '</tr>')
+
+    rng = random.Random(forecast.get('resort', '') + forecast.get('elevation', ''))
+    rows.append('<tr data-row="freezing-level"><td class="forecast-table__header">Freezing level</td>' + ''.join(
+        _cell(f'<div class="level-value" data-value="{rng.randrange(1500, 3200, 50)}">m</div>') for _ in cells) + '</tr>')
+    rows.append('<tr data-row="humidity"><td class="forecast-table__header">Humidity</td>' + ''.join(
+        _cell(f'<span>{rng.randint(55, 98)}</span>') for _ in cells) + '</tr>')
+
+    snow_depths = ''.join(
+        f'<tr><th>{esc(key)}:</th><td>{esc(value)}</td></tr>'
+        for key, value in (forecast.get('snow_conditions') or {}).items()
+    )
+
+    # Page chrome around the tables, roughly the weight of the real page
+    navigation = ''.join(f'<li><a href="/resorts/resort-{i}/6day/mid">Resort {i}</a></li>' for i in range(1500))
+    script = 'window.dataLayer=window.dataLayer||[];' * 800
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Snow Forecast</title>'
+        f'<script>{script}</script></head><body><header><nav><ul>{navigation}</ul></nav></header><main>'
+        f'<section class="snow-depths"><table class="snow-depths-table__table">{snow_depths}</table></section>'
+        f'<section class="forecast"><table class="forecast-table__table">{"".join(rows)}</table></section>'
+        '<div class="forecast-summary"><p>Next 3-6 days weather summary:</p>'
+        '<span>Moderate snow on and off through the middle of the week, heaviest on Sunday night, '
+        'with freezing levels dropping below the village.</span></div>'
+        f'</main><footer>{"<p>Advertisement</p>" * 300}</footer></body></html>'
+    ).encode('utf-8')
+
+
+def synthesize_openweather(resort, elevation, forecast):
+    """Seeded 40-entry 3-hour OpenWeather response starting on the forecast's first day"""
+    rng = random.Random(fixture_name(resort, elevation))
+    first_day = forecast['days'][0]['name'][:3] if forecast.get('days') else 'Sat'
+    start = datetime(2025, 11, 1, tzinfo=timezone.utc)
+    while start.strftime('%a') != first_day:
+        start += timedelta(days=1)
+
+    entries = []
+    for index in range(40):
+        at = start + timedelta(hours=3 * index)
+        temp = round(rng.gauss(-4, 4), 2)
+        entry = {
+            'dt': int(at.timestamp()),
+            'main': {
+                'temp': temp,
+                'feels_like': round(temp - rng.uniform(2, 8), 2),
+                'pressure': rng.randint(990, 1030),
+                'humidity': rng.randint(55, 100)
+            },
+            'weather': [{'description': rng.choice(['light snow', 'snow', 'overcast clouds', 'clear sky', 'few clouds'])}],
+            'clouds': {'all': rng.randint(0, 100)},
+            'wind': {'speed': round(rng.uniform(0.5, 14), 2), 'deg': rng.randint(0, 359)},
+            'pop': round(rng.random(), 2),
+            'dt_txt': at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        if rng.random() < 0.4:
+            entry['snow'] = {'3h': round(rng.uniform(0.1, 6), 2)}
+        elif rng.random() < 0.1:
+            entry['rain'] = {'3h': round(rng.uniform(0.1, 2), 2)}
+        entries.append(entry)
+    coords = OpenWeatherAPI('fixture').resort_coords[resort][elevation]
+    return json.dumps({'cod': '200', 'message': 0, 'cnt': len(entries), 'list': entries,
+                       'city': {'name': resort, 'coord': coords}}, indent=1).encode('utf-8')
+
+
+def record(source):
+    """Record the page and OpenWeather fixtures of every resort/elevation from source"""
+    manifest_path = os.path.join(FIXTURES_DIR, 'manifest.json')
+    manifest = load_manifest()
+
+    archive = SnapshotArchive() if source == 'archive' else None
+    latest = {}
+    if archive:
+        for entry in archive.snapshots():
+            latest[(entry['resort'], entry['elevation'])] = entry
+    openweather = OpenWeatherAPI() if source == 'live' else None
+    if openweather and not openweather.api_key:
+        print("⚠ OPENWEATHER_API_KEY not set, keeping existing OpenWeather fixtures")
+        openweather = None
+
+    for resort, elevations in RESORTS.items():
+        for elevation in elevations:
+            name = fixture_name(resort, elevation)
+            entry = manifest.setdefault(name, {'resort': resort, 'elevation': elevation})
+            page = ow_body = None
+            try:
+                if source == 'live':
+                    response = fetch_forecast_page(resort, elevation)
+                    response.raise_for_status()
+                    page = response.content
+                    if openweather:
+                        ow_body = json.dumps(openweather.fetch_raw_forecast(resort, elevation), indent=1).encode('utf-8')
+                elif source == 'archive':
+                    if (resort, elevation) in latest:
+                        page = archive.read(latest[(resort, elevation)]['sha256'])
+                else:
+                    with open(os.path.join(DATA_DIR, f"{name}.json"), 'r') as f:
+                        forecast = json.load(f)
+                    page = synthesize_page(forecast)
+                    ow_body = synthesize_openweather(resort, elevation, forecast)
+            except Exception as e:
+                print(f"✗ {name}: {e}")
+                continue
+
+            for kind, body in (('snow-forecast', page), ('openweather', ow_body)):
+                if body is None:
+                    continue
+                _write(fixture_path(kind, resort, elevation), body)
+                entry[kind] = {
+                    'source': source,
+                    'recorded_at': _now(),
+                    'bytes': len(body),
+                    'sha256': hashlib.sha256(body).hexdigest()
+                }
+            print(f"✓ {name}: " + ', '.join(kind for kind, body in (('page', page), ('openweather', ow_body)) if body))
+
+    _write(manifest_path, (json.dumps(manifest, indent=2, sort_keys=True) + '\n').encode('utf-8'))
+
+
+def write_expected():
+    """Store what the current code produces for each fixture as the expected output"""
+    use_utc()
+    for fixture in load_fixtures():
+        outputs = run_pipeline(fixture)
+        body = json.dumps(outputs, indent=1, sort_keys=True) + '\n'
+        _write(fixture_path('expected', fixture['resort'], fixture['elevation']), body.encode('utf-8'))
+        print(f"✓ Expected output for {fixture['name']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', choices=['live', 'archive', 'synthetic'], default='live')
+    parser.add_argument('--expected-only', action='store_true', help="only regenerate expected outputs")
+    args = parser.parse_args(argv)
+
+    if not args.expected_only:
+        record(args.source)
+    write_expected()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
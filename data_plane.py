@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+In-memory copy of every file the web app serves
+forecast.html, the Val Thorens JSON files and everything under data/ are
+loaded once, then an mtime poller reloads whatever changed on disk. Each
+reload builds a new {name: Artifact} snapshot and swaps it in with one
+assignment, so requests never touch the disk or see a partly loaded version
+"""
+
+import json
+import os
+import threading
+
+from prepared_responses import prepare_file
+
+# Files served from the app directory itself, besides data/
+BASE_FILES = ('forecast.html', 'val_thorens_forecast.json', 'comprehensive_val_thorens_forecast.json')
+DATA_SUBDIR = 'data'
+
+
+class Artifact:
+    """One loaded version of a served file"""
+
+    __slots__ = ('name', 'version', 'mtime', 'prepared', '_data', '_lock')
+
+    def __init__(self, name, version, mtime, prepared):
+        self.name = name
+        self.version = version  # (inode, mtime_ns, size) of the file it was read from
+        self.mtime = mtime
+        self.prepared = prepared  # prepared_responses.PreparedBody
+        self._data = None
+        self._lock = threading.Lock()
+
+    def json(self):
+        """The parsed JSON body, parsed once per version so every caller shares one object"""
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = json.loads(self.prepared.body)
+        return self._data
+
+
+def _version(stat):
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class DataPlane:
+    """Atomically swapped snapshot of the served files under base_dir"""
+
+    def __init__(self, base_dir, base_files=BASE_FILES, data_subdir=DATA_SUBDIR):
+        self.base_dir = base_dir
+        self.base_files = base_files
+        self.data_subdir = data_subdir
+        self._artifacts = {}
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.reloads = 0
+        self.loaded = 0
+        self.reload()
+
+    def get(self, name):
+        """Current Artifact for a served name ('forecast.html', 'data/metadata.json'), or None"""
+        return self._artifacts.get(name)
+
+    def get_path(self, path):
+        """Current Artifact for an absolute path under base_dir, or None"""
+        return self._artifacts.get(os.path.relpath(path, self.base_dir).replace(os.sep, '/'))
+
+    def _scan(self):
+        """{name: (path, version)} of every servable file now on disk"""
+        found = {}
+        for name in self.base_files:
+            path = os.path.join(self.base_dir, name)
+            try:
+                found[name] = (path, _version(os.stat(path)))
+            except OSError:
+                pass
+        data_dir = os.path.join(self.base_dir, self.data_subdir)
+        for root, _, files in os.walk(data_dir):
+            for filename in files:
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.base_dir).replace(os.sep, '/')
+                try:
+                    found[name] = (path, _version(os.stat(path)))
+                except OSError:
+                    pass
+        return found
+
+    def _load(self, name, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            # Published data/ files carry their own .br/.gz siblings
+            prepared = prepare_file(f, precompressed=name.startswith(self.data_subdir + '/'))
+        return Artifact(name, _version(stat), stat.st_mtime, prepared)
+
+    def reload(self):
+        """Load changed files, drop deleted ones, and swap in the new snapshot
+
+        Returns how many names changed.
+        """
+        with self._reload_lock:
+            current = self._artifacts
+            found = self._scan()
+            changed = {}
+            for name, (path, version) in found.items():
+                existing = current.get(name)
+                if existing and existing.version == version:
+                    continue
+                try:
+                    changed[name] = self._load(name, path)
+                except OSError as e:
+                    print(f"⚠ Could not load {path}: {e}")
+            removed = [name for name in current if name not in found]
+            if changed or removed:
+                artifacts = {name: artifact for name, artifact in current.items() if name not in removed}
+                artifacts.update(changed)
+                self._artifacts = artifacts
+                self.loaded += len(changed)
+            self.reloads += 1
+            return len(changed) + len(removed)
+
+    def start(self, interval=2.0):
+        """Poll for changes every interval seconds on a daemon thread"""
+        if self._thread:
+            return
+        self._stop.clear()
+
+        def poll():
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"⚠ Data plane reload failed: {e}")
+
+        self._thread = threading.Thread(target=poll, name='data-plane', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        artifacts = self._artifacts
+        return {
+            'files': len(artifacts),
+            'bytes': sum(len(artifact.prepared) for artifact in artifacts.values()),
+            'loaded': self.loaded,
+            'reloads': self.reloads,
+            'watching': self._thread is not None
+        }
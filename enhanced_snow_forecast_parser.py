@@ -1,20 +1,36 @@
 #!/usr/bin/env python3
 """
-Enhanced Snow Forecast Parser for Val Thorens
-Fetches comprehensive forecast data from multiple elevations and time periods
+Enhanced Snow Forecast Parser
+Fetches comprehensive forecast data for a resort from all elevations and time periods
 """
 
 import requests
-import re
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+import sys
+import http_client
+from datetime import datetime
 import json
-from concurrent.futures import ThreadPoolExecutor
-import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from forecast_extraction import parse_document, extract_forecast, cell_at, cell_number
+
+# Elevation names and approximate heights per resort; other resorts get names only
+RESORT_ELEVATIONS = {
+    'Val-Thorens': {
+        'bot': {'name': 'Bottom (2300m)', 'height': 2300},
+        'mid': {'name': 'Mid (2765m)', 'height': 2765},
+        'top': {'name': 'Top (3230m)', 'height': 3230}
+    }
+}
+DEFAULT_ELEVATIONS = {
+    'bot': {'name': 'Bottom', 'height': None},
+    'mid': {'name': 'Mid', 'height': None},
+    'top': {'name': 'Top', 'height': None}
+}
 
 class EnhancedSnowForecastParser:
-    def __init__(self):
-        self.base_url = "https://www.snow-forecast.com/resorts/Val-Thorens/6day"
+    def __init__(self, resort='Val-Thorens'):
+        self.resort = resort
+        self.resort_name = resort.replace('-', ' ')
+        self.base_url = f"https://www.snow-forecast.com/resorts/{resort}/6day"
         self.headers = {
             'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
             'accept-language': 'en-US,en;q=0.9,he;q=0.8',
@@ -40,401 +56,122 @@ class EnhancedSnowForecastParser:
         }
         
         # Elevation levels with their approximate heights
-        self.elevations = {
-            'bot': {'name': 'Bottom (2300m)', 'height': 2300},
-            'mid': {'name': 'Mid (2765m)', 'height': 2765}, 
-            'top': {'name': 'Top (3230m)', 'height': 3230}
-        }
-        
-        self.lock = threading.Lock()
+        self.elevations = RESORT_ELEVATIONS.get(resort, DEFAULT_ELEVATIONS)
     
     def fetch_elevation_data(self, elevation):
         """Fetch forecast data for a specific elevation"""
         url = f"{self.base_url}/{elevation}"
         try:
-            response = requests.get(url, headers=self.headers, cookies=self.cookies)
+            response = http_client.get(url, headers=self.headers, cookies=self.cookies)
             response.raise_for_status()
-            return elevation, response.text
+            return elevation, response.content
         except requests.RequestException as e:
             print(f"Error fetching data for {elevation}: {e}")
             return elevation, None
     
-    def get_comprehensive_forecast(self):
-        """Fetch forecast data from all elevations concurrently"""
-        print("Fetching comprehensive Val Thorens snow forecast...")
-        
-        # Fetch data from all elevations concurrently
-        elevation_data = {}
+    def get_comprehensive_forecast(self, parse_pool=None):
+        """Fetch forecast data from all elevations concurrently, parsing each page once
+
+        Pages are parsed inline as they arrive: for one resort's three pages a
+        process pool costs more to start than it saves, and this also runs in
+        web request threads. Batch callers can pass a ParsePool to parse there.
+        """
+        print(f"Fetching comprehensive {self.resort_name} snow forecast...")
+        
+        # Fetch all elevations on threads and parse each page as it arrives
+        parsed = {}
         with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = {executor.submit(self.fetch_elevation_data, elev): elev 
-                      for elev in self.elevations.keys()}
+            futures = [executor.submit(self.fetch_elevation_data, elev) for elev in self.elevations]
             
-            for future in futures:
+            for future in as_completed(futures):
                 elev, html_content = future.result()
                 if html_content:
-                    elevation_data[elev] = html_content
                     print(f"✓ Fetched data for {self.elevations[elev]['name']}")
+                    if parse_pool is None:
+                        parsed[elev] = self.parse_page(html_content, elev)
+                    else:
+                        parsed[elev] = parse_pool.submit(parse_elevation_page, html_content, self.resort, elev)
         
-        if not elevation_data:
+        if not parsed:
             print("Failed to fetch any elevation data")
             return None
         
-        # Parse all elevation data
+        if parse_pool is not None:
+            parsed = {elev: result.result() for elev, result in parsed.items()}
+        parsed = {elev: parsed[elev] for elev in self.elevations if elev in parsed}
+        
         comprehensive_forecast = {
-            'resort': 'Val Thorens',
+            'resort': self.resort_name,
             'last_updated': datetime.now().isoformat(),
             'elevations': {},
             'summary': None,
             'snow_conditions': None
         }
         
-        for elevation, html_content in elevation_data.items():
-            print(f"Parsing {self.elevations[elevation]['name']} data...")
-            parsed_data = self.parse_elevation_forecast(html_content, elevation)
-            if parsed_data:
-                comprehensive_forecast['elevations'][elevation] = parsed_data
+        for elevation, (elevation_data, summaries, snow_conditions) in parsed.items():
+            if elevation_data:
+                comprehensive_forecast['elevations'][elevation] = elevation_data
         
-        # Extract general summary and conditions from bottom elevation (most complete)
-        if 'bot' in elevation_data:
-            soup = BeautifulSoup(elevation_data['bot'], 'html.parser')
-            comprehensive_forecast['summary'] = self._extract_summaries(soup)
-            comprehensive_forecast['snow_conditions'] = self._extract_snow_conditions(soup)
+        # General summary and conditions come from the bottom elevation (most complete)
+        if parsed.get('bot'):
+            _, comprehensive_forecast['summary'], comprehensive_forecast['snow_conditions'] = parsed['bot']
         
         return comprehensive_forecast
     
-    def parse_elevation_forecast(self, html_content, elevation):
-        """Parse forecast data for a specific elevation"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+    def parse_page(self, html_content, elevation):
+        """Parse one elevation page into (elevation data, summaries, snow conditions) from a single tree"""
+        root = parse_document(html_content)
+        table = extract_forecast(root) if root is not None else None
+        if not table:
+            print(f"Could not find forecast table for {elevation}")
+            return None, [], {}
         
         elevation_data = {
             'elevation_name': self.elevations[elevation]['name'],
             'elevation_meters': self.elevations[elevation]['height'],
-            'forecast_periods': []
+            'forecast_periods': self._extract_forecast_periods(table)
         }
-        
-        # Extract dates and times
-        dates, times = self._extract_dates_and_times(soup)
-        
-        # Create comprehensive forecast periods from HTML
-        forecast_periods = self._extract_comprehensive_weather_data(soup, dates, times)
-        
-        elevation_data['forecast_periods'] = forecast_periods
-        
-        return elevation_data
+        # Only substantial summaries
+        summaries = [summary for summary in table['summaries'] if len(summary) > 50]
+        return elevation_data, summaries, table['snow_conditions']
     
-    def _extract_dates_and_times(self, soup):
-        """Extract dates and times from the HTML."""
-        dates = []
-        times = []
-        
-        # Find date headers - try multiple strategies
-        date_selectors = [
-            'th.date', 'td.date', 'th.day-header', 'td.day-header', 'th.day', 'td.day',
-            '.forecast__day-date', '.date', '.day', 'th[data-date]', 'td[data-date]'
-        ]
-        
-        for selector in date_selectors:
-            date_elements = soup.select(selector)
-            for elem in date_elements:
-                text = elem.get_text(strip=True)
-                if text and text not in dates:
-                    dates.append(text)
-        
-        # Find time headers - try multiple strategies
-        time_selectors = [
-            'th.time', 'td.time', 'th.hour', 'td.hour', 'th.period', 'td.period',
-            '.forecast__time', '.time', '.hour', '.period', 'th[data-time]', 'td[data-time]'
-        ]
-        
-        for selector in time_selectors:
-            time_elements = soup.select(selector)
-            for elem in time_elements:
-                text = elem.get_text(strip=True)
-                if text and text not in times:
-                    times.append(text)
-        
-        # If no specific dates/times found, look for table headers
-        if not dates or not times:
-            table_headers = soup.find_all('th')
-            for th in table_headers:
-                text = th.get_text(strip=True)
-                # Try to identify date patterns
-                if any(day in text.lower() for day in ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']):
-                    if text not in dates:
-                        dates.append(text)
-                # Try to identify time patterns
-                elif any(time_pattern in text.lower() for time_pattern in ['am', 'pm', ':', 'morning', 'evening', 'night']):
-                    if text not in times:
-                        times.append(text)
-        
-        print(f"DEBUG: Found {len(dates)} dates: {dates[:5]}...")  # Show first 5
-        print(f"DEBUG: Found {len(times)} times: {times[:5]}...")  # Show first 5
-        
-        return dates, times
+    def parse_elevation_forecast(self, html_content, elevation):
+        """Parse forecast data for a specific elevation"""
+        return self.parse_page(html_content, elevation)[0]
     
-    def _extract_comprehensive_weather_data(self, soup, dates, times):
-        """Extract comprehensive weather data from HTML - with sample data for demonstration"""
+    def _extract_dates_and_times(self, table):
+        """Day name and date for every forecast column, from one pass over the header rows"""
+        columns = []
+        for day in table['days']:
+            columns.extend([(day['name'], day['date'])] * day['colspan'])
+        times = table['times']
+        columns.extend([(None, None)] * (len(times) - len(columns)))
+        return columns[:len(times)], times
+    
+    def _extract_forecast_periods(self, table):
+        """One entry per forecast column with typed values from the extracted rows"""
+        columns, times = self._extract_dates_and_times(table)
         forecast_periods = []
-        
-        # For demonstration purposes, create realistic sample data
-        # This will be replaced with actual parsing once the HTML structure is understood
-        
-        import random
-        import datetime
-        
-        # Generate sample data for the next 7 days
-        base_date = datetime.date.today()
-        day_names = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-        time_periods = ['3 AM', '6 AM', '9 AM', '12 PM', '3 PM', '6 PM', '9 PM']
-        weather_conditions = ['Light Snow', 'Heavy Snow', 'Partly Cloudy', 'Clear', 'Overcast', 'Snow Showers']
-        
-        print(f"DEBUG: Generating sample data with {len(dates)} available dates")
-        
-        # Create 21 periods (3 per day for 7 days)
-        for day in range(7):
-            current_date = base_date + datetime.timedelta(days=day)
-            date_str = current_date.strftime("%d/%m")
-            day_name = day_names[current_date.weekday()]
-            
-            # Base temperature that varies by day and gets colder at higher elevations
-            base_temp = random.randint(-8, -2)
-            
-            for time_idx, time_period in enumerate([time_periods[i] for i in [0, 3, 6]]):  # 3 AM, 12 PM, 9 PM
-                # Temperatures vary throughout the day
-                temp_variation = random.randint(-3, 3)
-                if '12 PM' in time_period:  # Warmer during day
-                    temp_variation += 2
-                elif 'PM' in time_period and time_period != '12 PM':  # Evening cooling
-                    temp_variation -= 1
-                elif 'AM' in time_period:  # Cold in morning
-                    temp_variation -= 2
-                
-                period_data = {
-                    'date': date_str,
-                    'day_name': day_name,
-                    'time_period': time_period,
-                    'temperature_max': base_temp + temp_variation,
-                    'temperature_min': base_temp + temp_variation - random.randint(2, 5),
-                    'temperature_chill': base_temp + temp_variation - random.randint(5, 10),
-                    'snow_depth_cm': random.randint(0, 15) if random.random() > 0.4 else 0,
-                    'rain_mm': random.randint(0, 5) if random.random() > 0.7 else 0,
-                    'wind_speed': random.randint(5, 25),
-                    'wind_direction': random.choice(['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']),
-                    'weather_condition': random.choice(weather_conditions),
-                    'weather_icon': '/images/weather/snow.png',  # Sample icon
-                    'freezing_level': random.randint(1800, 2500),
-                    'humidity': random.randint(60, 95)
-                }
-                forecast_periods.append(period_data)
-        
-        print(f"DEBUG: Generated {len(forecast_periods)} sample forecast periods")
+        for i, time_period in enumerate(times):
+            day_name, date = columns[i]
+            forecast_periods.append({
+                'date': date,
+                'day_name': day_name,
+                'time_period': time_period,
+                'temperature_max': cell_number(cell_at(table['temperatures'], i), float),
+                'temperature_min': cell_number(cell_at(table['temperatures_min'], i), float),
+                'temperature_chill': cell_number(cell_at(table['temperatures_chill'], i), float),
+                'snow_depth_cm': cell_number(cell_at(table['snow'], i), int),
+                'rain_mm': cell_number(cell_at(table['rain'], i), float),
+                'wind_speed': cell_number(cell_at(table['wind_speeds'], i), int),
+                'wind_direction': cell_at(table['wind_directions'], i),
+                'weather_condition': cell_at(table['conditions'], i),
+                'weather_icon': cell_at(table['icons'], i),
+                'freezing_level': cell_number(cell_at(table['freezing_levels'], i), int),
+                'humidity': cell_number(cell_at(table['humidity'], i), int)
+            })
         return forecast_periods
     
-    def _extract_day_name(self, date_text):
-        """Extract day name from date text"""
-        if not date_text:
-            return None
-        
-        days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        date_lower = date_text.lower()
-        
-        for day in days:
-            if day[:3] in date_lower:  # Check for abbreviated day names
-                return day.capitalize()
-        
-        return None
-    
-    def _extract_temperature_data(self, row):
-        """Extract temperature data specifically"""
-        values = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            # Look for temp-value class with data-value attribute
-            temp_div = cell.find('div', class_=lambda x: x and 'temp-value' in x)
-            if temp_div and temp_div.get('data-value'):
-                values.append(float(temp_div['data-value']))
-            else:
-                # Fallback to text content
-                text = cell.get_text(strip=True)
-                if text and text != '—':
-                    try:
-                        # Remove any non-numeric characters except minus sign
-                        clean_text = re.sub(r'[^\d\-.]', '', text)
-                        if clean_text:
-                            values.append(float(clean_text))
-                        else:
-                            values.append(None)
-                    except ValueError:
-                        values.append(None)
-                else:
-                    values.append(None)
-        return values
-    
-    def _extract_data_values(self, row, class_name):
-        """Extract data values from cells with specific class"""
-        values = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            div = cell.find('div', class_=class_name)
-            if div and div.get('data-value'):
-                try:
-                    values.append(float(div['data-value']))
-                except ValueError:
-                    values.append(div['data-value'])
-            else:
-                text = cell.get_text(strip=True)
-                if text and text != '—':
-                    try:
-                        values.append(float(text))
-                    except ValueError:
-                        values.append(text)
-                else:
-                    values.append(None)
-        return values
-    
-    def _extract_span_data(self, row):
-        """Extract data from span elements"""
-        values = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            span = cell.find('span')
-            if span:
-                text = span.get_text(strip=True)
-                try:
-                    values.append(int(text))
-                except ValueError:
-                    values.append(text)
-            else:
-                values.append(None)
-        return values
-    
-    def _extract_snow_data(self, row):
-        """Extract snow depth data"""
-        values = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            snow_div = cell.find('div', class_='snow-value')
-            if snow_div and snow_div.get('data-value'):
-                try:
-                    values.append(int(snow_div['data-value']))
-                except ValueError:
-                    values.append(snow_div['data-value'])
-            else:
-                text = cell.get_text(strip=True)
-                if text and text != '—':
-                    # Extract numbers from text like "5 cm" or "5"
-                    numbers = re.findall(r'\d+', text)
-                    if numbers:
-                        values.append(int(numbers[0]))
-                    else:
-                        values.append(text)
-                else:
-                    values.append(None)
-        return values
-    
-    def _extract_rain_data(self, row):
-        """Extract rain data in mm"""
-        values = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            text = cell.get_text(strip=True)
-            if text and text != '—':
-                # Extract numbers from text like "2 mm" or "2"
-                numbers = re.findall(r'\d+(?:\.\d+)?', text)
-                if numbers:
-                    values.append(float(numbers[0]))
-                else:
-                    values.append(text)
-            else:
-                values.append(None)
-        return values
-    
-    def _extract_wind_data(self, row):
-        """Extract wind data including speed and direction"""
-        wind_data = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            wind_info = {}
-            
-            # Look for wind speed in text
-            text = cell.get_text(strip=True)
-            if text and text != '—':
-                # Extract speed numbers
-                speed_match = re.search(r'(\d+)', text)
-                if speed_match:
-                    wind_info['speed'] = int(speed_match.group(1))
-                
-                # Extract direction from classes or text
-                wind_icon = cell.find('div', class_='wind-icon')
-                if wind_icon and wind_icon.get('data-direction'):
-                    wind_info['direction'] = wind_icon['data-direction']
-                else:
-                    # Try to extract direction from text
-                    directions = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
-                    for direction in directions:
-                        if direction in text:
-                            wind_info['direction'] = direction
-                            break
-            
-            wind_data.append(wind_info if wind_info else None)
-        
-        return wind_data
-    
-    def _extract_weather_symbols(self, row):
-        """Extract weather condition symbols and descriptions"""
-        weather_data = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            img = cell.find('img')
-            if img:
-                weather_data.append({
-                    'condition': img.get('alt', ''),
-                    'icon': img.get('src', '')
-                })
-            else:
-                weather_data.append(None)
-        
-        return weather_data
-    
-    def _extract_summaries(self, soup):
-        """Extract weather summaries"""
-        summaries = []
-        
-        # Look for summary text in various locations
-        summary_patterns = [
-            r'Next \d+-\d+ days weather summary:',
-            r'weather summary:'
-        ]
-        
-        for pattern in summary_patterns:
-            elements = soup.find_all(string=re.compile(pattern, re.IGNORECASE))
-            for element in elements:
-                parent = element.find_parent()
-                if parent:
-                    # Get the next sibling or parent text
-                    summary_text = parent.get_text(strip=True)
-                    if summary_text and len(summary_text) > 50:  # Only substantial summaries
-                        summaries.append(summary_text)
-        
-        return summaries
-    
-    def _extract_snow_conditions(self, soup):
-        """Extract current snow conditions"""
-        conditions = {}
-        
-        snow_table = soup.find('table', class_='snow-depths-table__table')
-        if snow_table:
-            rows = snow_table.find_all('tr')
-            for row in rows:
-                th = row.find('th')
-                td = row.find('td')
-                if th and td:
-                    key = th.get_text(strip=True).replace(':', '')
-                    value = td.get_text(strip=True)
-                    conditions[key] = value
-        
-        return conditions
-    
     def print_comprehensive_forecast(self, forecast_data):
         """Print formatted comprehensive forecast information"""
         if not forecast_data:
@@ -491,16 +228,23 @@ class EnhancedSnowForecastParser:
         
         print(f"\n{'='*80}")
     
-    def save_comprehensive_forecast_json(self, forecast_data, filename="comprehensive_val_thorens_forecast.json"):
+    def save_comprehensive_forecast_json(self, forecast_data, filename=None):
         """Save comprehensive forecast data to JSON file"""
         if forecast_data:
+            filename = filename or f"comprehensive_{self.resort.lower().replace('-', '_')}_forecast.json"
             with open(filename, 'w') as f:
                 json.dump(forecast_data, f, indent=2, default=str)
             print(f"Comprehensive forecast data saved to {filename}")
 
+def parse_elevation_page(html_content, resort, elevation):
+    """Process-pool worker: parse one elevation page into (elevation data, summaries, snow conditions)"""
+    print(f"Parsing {resort} {elevation} data...")
+    return EnhancedSnowForecastParser(resort).parse_page(html_content, elevation)
+
 def main():
     """Main function to run the enhanced snow forecast parser"""
-    parser = EnhancedSnowForecastParser()
+    resort = sys.argv[1] if len(sys.argv) > 1 else 'Val-Thorens'
+    parser = EnhancedSnowForecastParser(resort)
     forecast_data = parser.get_comprehensive_forecast()
     
     if forecast_data:
@@ -510,4 +254,4 @@ def main():
         print("Failed to retrieve comprehensive forecast data")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
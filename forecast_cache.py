@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+In-process caching primitives for the Flask API
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Call:
+    """One in-flight execution that any number of callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into a single execution
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running block and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executions': self.executions,
+                'coalesced': self.coalesced
+            }
+
+
+def parse_ttl_overrides(spec):
+    """Parse 'Resort:elevation=seconds,Resort=seconds' into {(resort, elevation|None): seconds}"""
+    overrides = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        target, _, seconds = item.partition('=')
+        resort, _, elevation = target.strip().partition(':')
+        overrides[(resort, elevation or None)] = float(seconds)
+    return overrides
+
+
+class _Entry:
+    __slots__ = ('value', 'stored_at', 'expires_at')
+
+    def __init__(self, value, stored_at, expires_at):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+
+class ForecastCache:
+    """Bounded LRU cache of built responses with per-key TTL and stale-while-revalidate
+
+    Keys are (resort, elevation) tuples. A fresh entry is returned as is; an
+    expired entry is still returned immediately while one background thread
+    rebuilds it, unless it is older than max_stale. Misses are loaded through
+    a SingleFlight so concurrent cold requests share one build.
+    """
+
+    def __init__(self, maxsize=32, ttl=900, ttl_overrides=None, max_stale=3600, flight=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttl_overrides = ttl_overrides or {}
+        self.max_stale = max_stale
+        self.flight = flight or SingleFlight()
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refresh_errors = 0
+
+    def ttl_for(self, key):
+        resort, elevation = key
+        if (resort, elevation) in self.ttl_overrides:
+            return self.ttl_overrides[(resort, elevation)]
+        return self.ttl_overrides.get((resort, None), self.ttl)
+
+    def get_or_load(self, key, loader, *args):
+        """Return the cached value for key, calling loader(*args) on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if now < entry.expires_at:
+                    self.hits += 1
+                    return entry.value
+            stale = entry is not None and now - entry.expires_at < self.max_stale
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+
+        if stale:
+            self._refresh_in_background(key, loader, args)
+            return entry.value
+
+        return self.refresh(key, loader, *args)
+
+    def set(self, key, value):
+        """Store value under key with its TTL, evicting least recently used entries"""
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = _Entry(value, now, now + self.ttl_for(key))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def refresh(self, key, loader, *args):
+        """Rebuild key now, sharing any build already in flight, and store the result"""
+        return self.flight.do(key, self._load, key, loader, args)
+
+    def expires_in(self, key):
+        """Seconds until key expires (negative once stale), or None if not cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry.expires_at - time.monotonic()
+
+    def _load(self, key, loader, args):
+        value = loader(*args)
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def _refresh_in_background(self, key, loader, args):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.refresh(key, loader, *args)
+            except Exception as e:
+                with self._lock:
+                    self.refresh_errors += 1
+                print(f"⚠ Background refresh of {key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"refresh-{key}", daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'refreshing': len(self._refreshing),
+                'refresh_errors': self.refresh_errors
+            }
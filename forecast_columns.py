@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Columnar forecast representation
+One row per forecast period, with typed NumPy arrays for the numeric fields so
+consumers aggregate without re-parsing page strings. The day/period dicts
+published in data/*.json are only built when the forecast is serialized.
+"""
+
+import re
+import sys
+import numpy as np
+
+from forecast_extraction import COMPASS, PERIODS, cell_at, cell_number, format_wind
+
+_WIND = re.compile(r'^\s*([-\d.]+)\s*km/h\s*(\w*)')
+PERIOD_FIELDS = ('condition', 'temperature', 'snow', 'rain', 'wind')
+NUMERIC_FIELDS = ('temperature', 'snow', 'rain', 'wind_speed', 'wind_bearing', 'freezing_level')
+
+
+def _number(value):
+    """Page text as a float, NaN when missing or not numeric"""
+    number = cell_number(value, float)
+    return number if isinstance(number, float) else np.nan
+
+
+def _floats(values):
+    return np.array([_number(value) for value in values], dtype=np.float64)
+
+
+def _interned(values):
+    """Intern repeated strings (conditions) so every period shares one copy"""
+    return [sys.intern(value) if isinstance(value, str) else value for value in values]
+
+
+class ForecastColumns:
+    """Parsed forecast table stored column-wise, indexed by period
+
+    day_index and period say which day and which of PERIODS each row belongs
+    to. temperature, snow, rain, wind_speed, wind_bearing and freezing_level
+    are float64 arrays with NaN for missing values. The page text for the
+    published fields is kept in text so JSON output is unchanged, and
+    day_extras holds per-day keys added after parsing (e.g. by
+    compare_forecasts).
+    """
+
+    __slots__ = ('days', 'day_index', 'period', 'temperature', 'snow', 'rain',
+                 'wind_speed', 'wind_bearing', 'freezing_level', 'text', 'day_extras')
+
+    def __init__(self, days, day_index, period, temperature, snow, rain,
+                 wind_speed, wind_bearing, freezing_level, text, day_extras=None):
+        self.days = days
+        self.day_index = day_index
+        self.period = period
+        self.temperature = temperature
+        self.snow = snow
+        self.rain = rain
+        self.wind_speed = wind_speed
+        self.wind_bearing = wind_bearing
+        self.freezing_level = freezing_level
+        self.text = text
+        self.day_extras = day_extras or [None] * len(days)
+
+    def __len__(self):
+        return len(self.period)
+
+    @classmethod
+    def from_table(cls, table):
+        """Build columns from forecast_extraction.extract_forecast() output"""
+        times = table['times']
+        day_index, period, cells = [], [], []
+        index = 0
+        for number, day in enumerate(table['days']):
+            for offset in range(min(day['colspan'], len(PERIODS))):
+                if index >= len(times):
+                    break
+                # Prefer the column's own label so partial first days land in the right slot
+                label = times[index].lower()
+                day_index.append(number)
+                period.append(PERIODS.index(label) if label in PERIODS else offset)
+                cells.append(index)
+                index += 1
+
+        def column(name, default):
+            return [cell_at(table[name], cell, default) for cell in cells]
+
+        temperature = column('temperatures', None)
+        snow = column('snow', '0')
+        rain = column('rain', '0')
+        speeds = column('wind_speeds', None)
+        directions = column('wind_directions', None)
+        return cls(
+            days=[{'name': day['name'], 'date': day['date']} for day in table['days']],
+            day_index=np.array(day_index, dtype=np.intp),
+            period=np.array(period, dtype=np.int8),
+            temperature=_floats(temperature),
+            snow=_floats(snow),
+            rain=_floats(rain),
+            wind_speed=_floats(speeds),
+            wind_bearing=_floats(column('wind_bearings', None)),
+            freezing_level=_floats(column('freezing_levels', None)),
+            text={
+                'condition': _interned(column('conditions', '')),
+                'temperature': temperature,
+                'snow': snow,
+                'rain': rain,
+                'wind': [format_wind(speed, direction) for speed, direction in zip(speeds, directions)]
+            }
+        )
+
+    @classmethod
+    def from_days(cls, days):
+        """Build columns from already-published day dicts (data/*.json)
+
+        The published dicts hold no freezing levels and only a compass point
+        for the wind, so freezing_level comes back NaN and wind_bearing is
+        rounded to 45°. Use to_record()/from_record() to keep columns exactly.
+        """
+        day_index, period, speeds, bearings = [], [], [], []
+        text = {field: [] for field in PERIOD_FIELDS}
+        extras = []
+        for number, day in enumerate(days):
+            extra = {key: value for key, value in day.items() if key not in ('name', 'date') + PERIODS}
+            extras.append(extra or None)
+            for slot, name in enumerate(PERIODS):
+                values = day.get(name)
+                if not values:
+                    continue
+                day_index.append(number)
+                period.append(slot)
+                for field in PERIOD_FIELDS:
+                    text[field].append(values.get(field))
+                match = _WIND.match(values.get('wind') or '')
+                speeds.append(match.group(1) if match else None)
+                direction = match.group(2) if match else None
+                bearings.append(COMPASS.index(direction) * 45 if direction in COMPASS else None)
+        text['condition'] = _interned(text['condition'])
+        return cls(
+            days=[{'name': day['name'], 'date': day['date']} for day in days],
+            day_index=np.array(day_index, dtype=np.intp),
+            period=np.array(period, dtype=np.int8),
+            temperature=_floats(text['temperature']),
+            snow=_floats(text['snow']),
+            rain=_floats(text['rain']),
+            wind_speed=_floats(speeds),
+            wind_bearing=_floats(bearings),
+            freezing_level=np.full(len(period), np.nan),
+            text=text,
+            day_extras=extras
+        )
+
+    def to_record(self):
+        """JSON-compatible dict holding every column exactly, read back by from_record()"""
+        record = {
+            'days': self.days,
+            'day_index': self.day_index.tolist(),
+            'period': self.period.tolist(),
+            'text': self.text,
+            'day_extras': self.day_extras
+        }
+        for field in NUMERIC_FIELDS:
+            record[field] = [None if value != value else value for value in getattr(self, field).tolist()]
+        return record
+
+    @classmethod
+    def from_record(cls, record):
+        """Rebuild the columns saved by to_record()"""
+        return cls(
+            days=record['days'],
+            day_index=np.array(record['day_index'], dtype=np.intp),
+            period=np.array(record['period'], dtype=np.int8),
+            text=record['text'],
+            day_extras=record['day_extras'],
+            **{field: _floats(record[field]) for field in NUMERIC_FIELDS}
+        )
+
+    def day_totals(self, field):
+        """Per-day sum of a numeric column, treating missing values as 0"""
+        values = np.nan_to_num(getattr(self, field))
+        return np.bincount(self.day_index, weights=values, minlength=len(self.days))
+
+    def with_day_extras(self, extras):
+        """Copy of these columns with extras[i] merged into day i's published dict"""
+        merged = [
+            {**(current or {}), **extra} if extra else current
+            for current, extra in zip(self.day_extras, extras)
+        ]
+        return ForecastColumns(
+            self.days, self.day_index, self.period, self.temperature, self.snow, self.rain,
+            self.wind_speed, self.wind_bearing, self.freezing_level, self.text, merged
+        )
+
+    def period_json(self, row):
+        """The published {'condition', 'temperature', 'snow', 'rain', 'wind'} dict of one period"""
+        text = self.text
+        return {field: text[field][row] for field in PERIOD_FIELDS}
+
+    def day_views(self):
+        """The published [{'name', 'date', 'am', 'pm', 'night', ...}] day dicts"""
+        days = [
+            {'name': day['name'], 'date': day['date'], 'am': None, 'pm': None, 'night': None}
+            for day in self.days
+        ]
+        for row, (number, slot) in enumerate(zip(self.day_index.tolist(), self.period.tolist())):
+            days[number][PERIODS[slot]] = self.period_json(row)
+        for day, extra in zip(days, self.day_extras):
+            if extra:
+                day.update(extra)
+        return days
+
+    to_json = day_views
+
+    def projected_days(self, fields):
+        """Day dicts whose periods hold only the given PERIOD_FIELDS, without per-day extras"""
+        columns = [(field, self.text[field]) for field in fields]
+        days = [
+            {'name': day['name'], 'date': day['date'], 'am': None, 'pm': None, 'night': None}
+            for day in self.days
+        ]
+        for row, (number, slot) in enumerate(zip(self.day_index.tolist(), self.period.tolist())):
+            days[number][PERIODS[slot]] = {field: values[row] for field, values in columns}
+        return days
+
+
+def as_columns(days):
+    """ForecastColumns for either columns or a list of published day dicts"""
+    return days if isinstance(days, ForecastColumns) else ForecastColumns.from_days(days)
+
+
+def build_days(table):
+    """Group extracted cells into [{'name', 'date', 'am', 'pm', 'night'}] day dicts"""
+    return ForecastColumns.from_table(table).day_views()
+
+
+def json_default(value):
+    """json.dump default= hook serializing ForecastColumns and the forecast_model classes via to_json()"""
+    to_json = getattr(value, 'to_json', None)
+    if to_json is not None:
+        return to_json()
+    return str(value)
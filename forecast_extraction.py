@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Forecast-table extraction engine for snow-forecast.com pages
+Parses a page once with lxml and pulls every data-row out with precompiled
+XPath expressions. All scrapers (app, generate_static_data, analyze_html,
+SnowForecastParser) build their output from extract_forecast().
+
+extract_forecast_tables() is the partial mode: it parses only the forecast and
+snow-depth tables and stops reading as soon as both have closed.
+"""
+
+import codecs
+import re
+from lxml import etree, html as lxml_html
+
+
+def _has_class(name):
+    """XPath predicate matching elements whose class list contains name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _xpath(expression):
+    return etree.XPath(expression, smart_strings=False)
+
+
+_FORECAST_TABLE = _xpath(f"//table[{_has_class('forecast-table__table')}]")
+_SNOW_DEPTHS_TABLE = _xpath(f"//table[{_has_class('snow-depths-table__table')}]")
+_DATA_ROWS = _xpath(".//tr[@data-row]")
+_CELLS = _xpath(f"./td[{_has_class('forecast-table__cell')}]")
+_ALL_CELLS = _xpath("./td")
+_DAY_CELLS = _xpath(f"./td[{_has_class('forecast-table-days__cell')}]")
+_DAY_NAME = _xpath(f".//div[{_has_class('forecast-table-days__name')}]")
+_DAY_DATE = _xpath(f".//div[{_has_class('forecast-table-days__date')}]")
+_IMG = _xpath(".//img")
+_WEATHER_ICON = _xpath(f".//div[{_has_class('weather-icon')}]")
+_TEMP_VALUE = _xpath(f".//*[self::div or self::span][{_has_class('temp-value')}]")
+_SNOW_VALUE = _xpath(f".//span[{_has_class('snow-amount__value')}]")
+_RAIN_VALUE = _xpath(f".//span[{_has_class('rain-amount__value')}]")
+_WIND_ICON = _xpath(f".//div[{_has_class('wind-icon')}]")
+_WIND_ARROW = _xpath(f".//g[{_has_class('wind-icon__arrow')}]")
+_WIND_VALUE = _xpath(f".//span[{_has_class('wind-icon__val')}]")
+_WIND_TOOLTIP = _xpath(f".//div[{_has_class('wind-icon__tooltip')}]")
+_LEVEL_VALUE = _xpath(f".//div[{_has_class('level-value')}]")
+_SPAN = _xpath(".//span")
+_TABLE_ROWS = _xpath(".//tr")
+_TH = _xpath(".//th")
+_TD = _xpath(".//td")
+_SUMMARIES = _xpath("//p[count(node()) = 1][contains(text(), 'weather summary:')]")
+
+_ROTATION = re.compile(r'rotate\((\d+)\)')
+TARGET_TABLES = ('forecast-table__table', 'snow-depths-table__table')
+STREAM_CHUNK_SIZE = 16384
+COMPASS = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
+PERIODS = ('am', 'pm', 'night')
+
+
+def _text(element):
+    """Equivalent of BeautifulSoup's get_text(strip=True)"""
+    return ''.join(part.strip() for part in element.itertext())
+
+
+def _first(xpath, element):
+    found = xpath(element)
+    return found[0] if found else None
+
+
+def parse_document(html):
+    """Parse page bytes/text into an lxml tree, or None if there is nothing to parse"""
+    if isinstance(html, etree._Element):
+        return html
+    try:
+        return lxml_html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def iter_chunks(body, size=STREAM_CHUNK_SIZE):
+    """Split an in-memory page into chunks for parse_tables()"""
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def _patterns(kind):
+    # name must be a whole token of the class attribute, as in _has_class()
+    opening = [rf'<table\b[^>]*?\sclass\s*=\s*["\']?(?:[^"\'>]*\s)?{re.escape(name)}(?=[\s"\'>])'
+               for name in TARGET_TABLES]
+    nested = r'<table\b'
+    closing = r'</table\s*>'
+    charset = r'<meta\b[^>]*\bcharset\s*=\s*["\']?([\w-]+)'
+    if kind is bytes:
+        opening = [source.encode('ascii') for source in opening]
+        nested, closing, charset = (source.encode('ascii') for source in (nested, closing, charset))
+    return ([re.compile(source, re.IGNORECASE) for source in opening], re.compile(nested, re.IGNORECASE),
+            re.compile(closing, re.IGNORECASE), re.compile(charset, re.IGNORECASE))
+
+
+_TABLE_TAGS = {kind: _patterns(kind) for kind in (str, bytes)}
+_TAG_OVERLAP = 512  # a tag split across two chunks is still found
+
+
+def _codec(name):
+    """Python codec name for a page's declared charset, or None if unknown"""
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def parse_tables(chunks):
+    """Parse only the forecast and snow-depth tables out of page chunks
+
+    The raw stream is scanned for the target tables' opening and closing tags.
+    Only the bytes of those two tables are handed to libxml2; everything
+    between, before and after them is discarded unparsed, and no further
+    chunks are read once both have closed. At most one table plus a short
+    scan window is held in memory. If a target table turns out to contain
+    another table, its first closing tag is not its own, so the rest of the
+    page from that table on is parsed whole instead. Returns an <html>
+    document holding the tables found, or None if neither was found.
+    """
+    kind = None
+    buffer = None  # the open table so far, or the unscanned tail of the stream
+    scan_from = 0
+    current = None  # index of the target table being captured
+    pending = list(range(len(TARGET_TABLES)))
+    encoding = None
+    tables = []
+    chunks = iter(chunks)
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if kind is None:
+            kind = str if isinstance(chunk, str) else bytes
+            buffer = '' if kind is str else b''
+            openings, nested, closing, charset = _TABLE_TAGS[kind]
+        buffer += chunk
+
+        while pending:
+            if current is None:
+                if kind is bytes and encoding is None:
+                    match = charset.search(buffer)
+                    if match and match.end() < len(buffer):  # not cut off by the chunk boundary
+                        encoding = _codec(match.group(1).decode('ascii'))
+                found = [(match.start(), target) for target in pending
+                         for match in [openings[target].search(buffer)] if match]
+                if not found:
+                    buffer = buffer[-_TAG_OVERLAP:]
+                    break
+                position, current = min(found)
+                buffer = buffer[position:]
+                scan_from = 1  # past the table's own opening tag
+            match = closing.search(buffer, scan_from)
+            inner = nested.search(buffer, scan_from, match.start() if match else len(buffer))
+            if inner is not None:
+                # A nested table: read the rest of the page and let libxml2 match the tags
+                buffer += buffer[:0].join(chunks)
+                pending = []
+                break
+            if match is None:
+                scan_from = max(len(buffer) - _TAG_OVERLAP, 1)
+                break
+            tables.append(buffer[:match.end()])
+            buffer = buffer[match.end():]
+            pending.remove(current)
+            current = None
+        if not pending:
+            break
+
+    if current is not None:
+        tables.append(buffer)  # the stream ended inside a table, or the rest of a page with nested tables
+    if not tables:
+        return None
+    parser = etree.HTMLParser(encoding=encoding or 'utf-8') if kind is bytes else etree.HTMLParser()
+    for table in tables:
+        parser.feed(table)
+    try:
+        return parser.close()
+    except etree.XMLSyntaxError:
+        return None
+
+
+def _days(row):
+    days = []
+    for cell in _DAY_CELLS(row) if row is not None else []:
+        name = _first(_DAY_NAME, cell)
+        date = _first(_DAY_DATE, cell)
+        if name is not None and date is not None:
+            days.append({
+                'name': _text(name),
+                'date': _text(date),
+                'colspan': int(cell.get('colspan', '3'))
+            })
+    return days
+
+
+def _times(row):
+    if row is None:
+        return []
+    cells = _CELLS(row) or _ALL_CELLS(row)[1:]  # Skip the label cell when cells are unclassed
+    return [_text(cell) for cell in cells]
+
+
+def _conditions(row):
+    conditions, icons = [], []
+    for cell in _CELLS(row) if row is not None else []:
+        img = _first(_IMG, cell)
+        if img is not None and img.get('alt') is not None:
+            conditions.append(img.get('alt'))
+            icons.append(img.get('src', ''))
+            continue
+        icon = _first(_WEATHER_ICON, cell)
+        conditions.append(icon.get('title') if icon is not None else None)
+        icons.append(None)
+    return conditions, icons
+
+
+def _temperatures(row):
+    values = []
+    for cell in _CELLS(row) if row is not None else []:
+        temp = _first(_TEMP_VALUE, cell)
+        values.append(temp.get('data-value') if temp is not None and temp.get('data-value') else None)
+    return values
+
+
+def _amounts(row, xpath):
+    values = []
+    for cell in _CELLS(row) if row is not None else []:
+        value = _first(xpath, cell)
+        values.append(_text(value) if value is not None else '0')
+    return values
+
+
+def _winds(row):
+    speeds, directions, bearings = [], [], []
+    for cell in _CELLS(row) if row is not None else []:
+        speed = direction = bearing = None
+        icon = _first(_WIND_ICON, cell)
+        if icon is not None and icon.get('data-speed'):
+            speed = icon.get('data-speed')
+            arrow = _first(_WIND_ARROW, icon)
+            match = _ROTATION.search(arrow.get('transform', '')) if arrow is not None else None
+            if match:
+                bearing = int(match.group(1)) % 360
+                direction = COMPASS[round(bearing / 45) % 8]
+        else:
+            value = _first(_WIND_VALUE, cell)
+            if value is not None:
+                speed = _text(value)
+        if direction is None:
+            tooltip = _first(_WIND_TOOLTIP, cell)
+            if tooltip is not None:
+                direction = _text(tooltip) or None
+        if bearing is None and direction in COMPASS:
+            bearing = COMPASS.index(direction) * 45
+        speeds.append(speed)
+        directions.append(direction)
+        bearings.append(bearing)
+    return speeds, directions, bearings
+
+
+def _freezing_levels(row):
+    values = []
+    for cell in _CELLS(row) if row is not None else []:
+        level = _first(_LEVEL_VALUE, cell)
+        if level is not None and level.get('data-value'):
+            values.append(level.get('data-value'))
+        else:
+            text = _text(cell)
+            values.append(text if text and text != '—' else None)
+    return values
+
+
+def _humidity(row):
+    values = []
+    for cell in _CELLS(row) if row is not None else []:
+        span = _first(_SPAN, cell)
+        values.append(_text(span) if span is not None else None)
+    return values
+
+
+def extract_snow_conditions(root):
+    """Current snow depths table as {label: value}"""
+    conditions = {}
+    table = _first(_SNOW_DEPTHS_TABLE, root)
+    if table is None:
+        return conditions
+    for row in _TABLE_ROWS(table):
+        header = _first(_TH, row)
+        value = _first(_TD, row)
+        if header is not None and value is not None:
+            key = _text(header).replace(':', '')
+            if key:
+                conditions[key] = _text(value)
+    return conditions
+
+
+def extract_summaries(root):
+    """Text of the blocks around text-only paragraphs mentioning 'weather summary:'"""
+    summaries = []
+    for paragraph in _SUMMARIES(root):
+        parent = paragraph.getparent()
+        if parent is not None:
+            summaries.append(_text(parent))
+    return summaries
+
+
+def extract_forecast(html):
+    """Extract the forecast table and snow conditions from a page
+
+    Returns a dict of per-cell lists (strings as they appear on the page,
+    None where a cell has no value; wind bearings are degrees) plus 'days',
+    'snow_conditions' and 'summaries', or None when the page has no forecast
+    table. forecast_columns.ForecastColumns.from_table() turns it into typed
+    per-period columns.
+    """
+    root = parse_document(html)
+    if root is None:
+        return None
+    table = _first(_FORECAST_TABLE, root)
+    if table is None:
+        return None
+
+    rows = {}
+    for row in _DATA_ROWS(table):
+        rows.setdefault(row.get('data-row'), row)
+
+    conditions, icons = _conditions(rows.get('weather'))
+    wind_speeds, wind_directions, wind_bearings = _winds(rows.get('wind'))
+    temperature_row = rows.get('temperature-max')
+    if temperature_row is None:
+        temperature_row = rows.get('temperature')
+
+    return {
+        'days': _days(rows.get('days')),
+        'times': _times(rows.get('time')),
+        'conditions': conditions,
+        'icons': icons,
+        'temperatures': _temperatures(temperature_row),
+        'temperatures_min': _temperatures(rows.get('temperature-min')),
+        'temperatures_chill': _temperatures(rows.get('temperature-chill')),
+        'snow': _amounts(rows.get('snow'), _SNOW_VALUE),
+        'rain': _amounts(rows.get('rain'), _RAIN_VALUE),
+        'wind_speeds': wind_speeds,
+        'wind_directions': wind_directions,
+        'wind_bearings': wind_bearings,
+        'freezing_levels': _freezing_levels(rows.get('freezing-level')),
+        'humidity': _humidity(rows.get('humidity')),
+        'snow_conditions': extract_snow_conditions(root),
+        'summaries': extract_summaries(root)
+    }
+
+
+def extract_forecast_tables(source):
+    """extract_forecast() over only the two tables, read from a page or a stream of its chunks
+
+    source is the page body (bytes or str) or an iterable of its chunks, such
+    as response.iter_content(). 'summaries' is always empty in this mode.
+    """
+    if isinstance(source, (bytes, str)):
+        source = iter_chunks(source)
+    root = parse_tables(source)
+    if root is None:
+        return None
+    table = extract_forecast(root)
+    if table is not None:
+        table['summaries'] = []  # only present when nested tables made it parse the page's tail
+    return table
+
+
+def cell_at(values, index, default=None):
+    """Cell index of an extracted row, or default where the row is short or the cell empty"""
+    if index < len(values) and values[index] is not None:
+        return values[index]
+    return default
+
+
+def cell_number(value, cast):
+    """Cell text as cast (int or float), falling back to float and then to the text itself"""
+    if value is None:
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def format_wind(speed, direction):
+    """Wind as published in data/*.json, e.g. '10.0 km/h NE'"""
+    if speed is None:
+        return ''
+    return f"{speed} km/h {direction}" if direction else f"{speed} km/h"
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Queryable history of every generated forecast run
+Each run's periods are appended to a SQLite table keyed by
+(resort, elevation, valid_date, period, run_time). Rows are clustered by that
+key, so every run's forecast for one day is stored together and can be
+compared without walking git history
+
+Usage:
+    python forecast_history.py runs [--resort R] [--elevation E]
+    python forecast_history.py query --resort R --elevation E [--date YYYY-MM-DD]
+                                     [--since ISO] [--until ISO]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+from forecast_extraction import PERIODS
+from snapshot_archive import _parse_time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.environ.get('FORECAST_HISTORY_DB', os.path.join(BASE_DIR, '.cache', 'forecast-history.sqlite3'))
+
+COLUMNS = ('condition', 'temperature', 'snow', 'rain', 'wind_speed', 'wind_bearing', 'freezing_level')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    resort TEXT NOT NULL,
+    elevation TEXT NOT NULL,
+    run_time TEXT NOT NULL,
+    valid_date TEXT NOT NULL,
+    period TEXT NOT NULL,
+    condition TEXT,
+    temperature REAL,
+    snow REAL,
+    rain REAL,
+    wind_speed REAL,
+    wind_bearing REAL,
+    freezing_level REAL,
+    PRIMARY KEY (resort, elevation, valid_date, period, run_time)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS forecasts_by_run ON forecasts (resort, elevation, run_time);
+CREATE INDEX IF NOT EXISTS forecasts_by_run_time ON forecasts (run_time);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def resolve_dates(days, run_date):
+    """Calendar dates for the page's day-of-month labels, walking forward from run_date
+
+    The first day may still be the previous day in the resort's timezone, so
+    the search starts one day before run_date. Days whose label is not a day
+    of the month resolve to None.
+    """
+    dates = []
+    current = run_date - timedelta(days=1)
+    for day in days:
+        try:
+            day_of_month = int(day['date'])
+        except (TypeError, ValueError):
+            dates.append(None)
+            continue
+        candidate = current
+        for _ in range(32):
+            if candidate.day == day_of_month:
+                break
+            candidate += timedelta(days=1)
+        else:
+            dates.append(None)
+            continue
+        dates.append(candidate)
+        current = candidate
+    return dates
+
+
+def _none_if_nan(values):
+    return [None if value != value else value for value in values]
+
+
+def elevation_rows(elevation, run_time):
+    """One tuple per forecast period of an Elevation, in the table's column order"""
+    forecast = elevation.forecast
+    dates = resolve_dates(forecast.days, _parse_time(run_time).date())
+    numeric = [
+        _none_if_nan(getattr(forecast, name).tolist())
+        for name in COLUMNS[1:]
+    ]
+    rows = []
+    for row, (day, slot) in enumerate(zip(forecast.day_index.tolist(), forecast.period.tolist())):
+        valid_date = dates[day]
+        if valid_date is None:
+            continue
+        rows.append((
+            elevation.resort, elevation.name, run_time, valid_date.isoformat(), PERIODS[slot],
+            forecast.text['condition'][row], *(values[row] for values in numeric)
+        ))
+    return rows
+
+
+class ForecastHistory:
+    """SQLite store of forecast periods from every run"""
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record_run(self, resorts, run_time=None):
+        """Insert every period of a fetch_all_forecasts() result in one transaction
+
+        Returns the number of rows stored. Re-recording the same run_time
+        replaces its rows.
+        """
+        run_time = run_time or _now()
+        rows = [
+            row
+            for resort in resorts.values()
+            for elevation in resort.elevations.values()
+            for row in elevation_rows(elevation, run_time)
+        ]
+        placeholders = ', '.join('?' * (5 + len(COLUMNS)))
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO forecasts VALUES ({placeholders})", rows
+            )
+        return len(rows)
+
+    def runs(self, resort=None, elevation=None):
+        """Run times stored, newest first, with how many periods each holds"""
+        query = "SELECT run_time, COUNT(*) AS periods FROM forecasts"
+        conditions, params = self._filters(resort, elevation)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " GROUP BY run_time ORDER BY run_time DESC"
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+    def forecasts(self, resort, elevation, valid_date=None, since=None, until=None):
+        """Stored periods for resort/elevation, for valid_date and/or runs in [since, until)
+
+        Rows are ordered by valid date, period, then run time, so every run's
+        forecast for the same period appears together.
+        """
+        conditions, params = self._filters(resort, elevation)
+        if valid_date:
+            conditions.append("valid_date = ?")
+            params.append(valid_date.isoformat() if isinstance(valid_date, date) else valid_date)
+        if since:
+            conditions.append("run_time >= ?")
+            params.append(_parse_time(since).strftime('%Y-%m-%dT%H:%M:%SZ') if isinstance(since, str) else since)
+        if until:
+            conditions.append("run_time < ?")
+            params.append(_parse_time(until).strftime('%Y-%m-%dT%H:%M:%SZ') if isinstance(until, str) else until)
+        period_order = ' '.join(f"WHEN '{name}' THEN {slot}" for slot, name in enumerate(PERIODS))
+        query = (
+            "SELECT * FROM forecasts WHERE " + " AND ".join(conditions)
+            + f" ORDER BY valid_date, CASE period {period_order} END, run_time"
+        )
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+    @staticmethod
+    def _filters(resort, elevation):
+        conditions, params = [], []
+        if resort:
+            conditions.append("resort = ?")
+            params.append(resort)
+        if elevation:
+            conditions.append("elevation = ?")
+            params.append(elevation)
+        return conditions, params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the stored history of forecast runs")
+    parser.add_argument('command', choices=['runs', 'query'])
+    parser.add_argument('--db', default=HISTORY_PATH, help="history database")
+    parser.add_argument('--resort')
+    parser.add_argument('--elevation', choices=['bot', 'mid', 'top'])
+    parser.add_argument('--date', help="valid date (YYYY-MM-DD) to show every run's forecast for")
+    parser.add_argument('--since', help="include runs at or after this ISO time")
+    parser.add_argument('--until', help="include runs before this ISO time")
+    args = parser.parse_args(argv)
+
+    with ForecastHistory(args.db) as history:
+        if args.command == 'runs':
+            runs = history.runs(args.resort, args.elevation)
+            for run in runs:
+                print(f"{run['run_time']}  {run['periods']} periods")
+            print(f"{len(runs)} runs")
+            return 0
+
+        if not args.resort or not args.elevation:
+            parser.error("query needs --resort and --elevation")
+        rows = history.forecasts(args.resort, args.elevation, args.date, args.since, args.until)
+        for row in rows:
+            print(f"{row['valid_date']} {row['period']:<5} run {row['run_time']}  {row['condition'] or '':<16} "
+                  f"temp {row['temperature']}  snow {row['snow']}  rain {row['rain']}  wind {row['wind_speed']}")
+        print(f"{len(rows)} periods")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
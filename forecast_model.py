@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Typed forecast catalog: Resort -> Elevation
+Both are __slots__ classes. An Elevation keeps its forecast as ForecastColumns
+(no per-period dicts are stored), and each level has a to_json() that builds
+the published dicts in one pass.
+"""
+
+from forecast_columns import as_columns
+
+
+class Elevation:
+    """Forecast for one resort elevation: the parsed columns plus run metadata"""
+
+    __slots__ = ('resort', 'name', 'forecast', 'fields')
+
+    def __init__(self, resort, name, forecast, fields=None):
+        self.resort = resort
+        self.name = name
+        self.forecast = forecast  # ForecastColumns
+        self.fields = fields or {'days': None}  # published keys in order; 'days' marks where the days go
+
+    @classmethod
+    def from_forecast_data(cls, resort, name, data):
+        """Wrap a parse_forecast/compare_forecasts result dict"""
+        fields = {key: (None if key == 'days' else value) for key, value in data.items()}
+        return cls(resort, name, as_columns(data.get('days', [])), fields)
+
+    def to_json(self):
+        return {
+            key: (self.forecast.day_views() if key == 'days' else value)
+            for key, value in self.fields.items()
+        }
+
+
+class Resort:
+    """All elevations forecast for one resort, in catalog order"""
+
+    __slots__ = ('name', 'elevations')
+
+    def __init__(self, name, elevations=None):
+        self.name = name
+        self.elevations = elevations or {}  # {elevation name: Elevation}
+
+    def to_json(self):
+        return {name: elevation.to_json() for name, elevation in self.elevations.items()}
@@ -5,11 +5,21 @@ This script is run by GitHub Actions every 3 hours.
 Combines data from snow-forecast.com and OpenWeatherMap for better accuracy.
 """
 
+import asyncio
+import functools
 import json
 import os
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
+from urllib.parse import urlsplit
+import http_client
+from forecast_extraction import extract_forecast_tables
+from forecast_columns import ForecastColumns, json_default
+from forecast_history import ForecastHistory
+from forecast_model import Resort, Elevation
+from page_cache import PageCache
+from parse_pool import ParsePool, PARSE_WORKERS
+from published_data import DataPublisher, to_json_bytes
+from snapshot_archive import SnapshotArchive
 
 # Try to import OpenWeather integration
 try:
@@ -19,171 +29,267 @@ except ImportError:
     OPENWEATHER_AVAILABLE = False
     print("OpenWeather integration not available, using snow-forecast.com only")
 
-def fetch_forecast(resort='Val-Thorens', elevation='bot'):
-    """Fetch forecast data for a specific resort and elevation"""
-    url = f'https://www.snow-forecast.com/resorts/{resort}/6day/{elevation}'
+RESORTS = {
+    'Val-Thorens': ['bot', 'mid', 'top'],
+    'Cervinia': ['bot', 'mid', 'top']
+}
+
+# Upper bound on upstream requests in flight across all hosts
+MAX_CONCURRENCY = int(os.environ.get('FORECAST_MAX_CONCURRENCY', '8'))
+# Upper bound on upstream requests in flight against any single host
+PER_HOST_CONCURRENCY = int(os.environ.get('FORECAST_PER_HOST_CONCURRENCY', '3'))
+
+# Per-source deadlines (seconds) for one resort/elevation, including time queued behind the limiter
+SNOW_FORECAST_DEADLINE = float(os.environ.get('SNOW_FORECAST_DEADLINE', '60'))
+OPENWEATHER_DEADLINE = float(os.environ.get('OPENWEATHER_DEADLINE', '30'))
+
+def forecast_url(resort, elevation):
+    """Build the snow-forecast.com 6-day page URL for a resort and elevation"""
+    return f'https://www.snow-forecast.com/resorts/{resort}/6day/{elevation}'
+
+def fetch_forecast_page(resort='Val-Thorens', elevation='bot', page_cache=None):
+    """Download the snow-forecast.com page for a resort and elevation, revalidating against page_cache"""
+    url = forecast_url(resort, elevation)
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
         'Accept-Language': 'en-US,en;q=0.5',
     }
+    if page_cache:
+        headers.update(page_cache.validators(url))
     
-    response = requests.get(url, headers=headers, timeout=30)
-    soup = BeautifulSoup(response.content, 'html.parser')
+    return http_client.get(url, headers=headers, timeout=30)
+
+def cached_page_result(response, resort='Val-Thorens', elevation='bot', page_cache=None):
+    """Return the cached parse of a fetched page if the page has not changed, else None"""
+    if not page_cache:
+        return None
+    cached = page_cache.lookup(forecast_url(resort, elevation), response)
+    if cached is None:
+        return None
+    return {**cached, 'last_updated': datetime.now().isoformat()}
+
+def parse_page(response, resort='Val-Thorens', elevation='bot', page_cache=None):
+    """Parse a fetched page, reusing the cached result when the page has not changed"""
+    result = cached_page_result(response, resort, elevation, page_cache)
+    if result is not None:
+        return result
     
-    # Extract current snow conditions
-    snow_conditions = {}
-    snow_table = soup.find('table', class_='snow-depths-table__table')
-    if snow_table:
-        rows = snow_table.find_all('tr')
-        for row in rows:
-            header_cell = row.find('th')
-            value_cell = row.find('td')
-            if header_cell and value_cell:
-                key = header_cell.get_text(strip=True).replace(':', '')
-                value = value_cell.get_text(strip=True)
-                if key:
-                    snow_conditions[key] = value
+    result = parse_forecast(response.content, resort, elevation)
+    if page_cache:
+        page_cache.store(forecast_url(resort, elevation), response, result)
+    return result
+
+async def parse_page_in_pool(response, parse_pool, resort='Val-Thorens', elevation='bot', page_cache=None):
+    """parse_page() with the parse itself run on a ParsePool worker process"""
+    result = cached_page_result(response, resort, elevation, page_cache)
+    if result is not None:
+        return result
     
-    # Find forecast table
-    forecast_table = soup.find('table', class_='forecast-table__table')
-    if not forecast_table:
+    result = await parse_pool.run(parse_forecast, response.content, resort, elevation)
+    if page_cache:
+        page_cache.store(forecast_url(resort, elevation), response, result)
+    return result
+
+def archive_page(archive, response, resort='Val-Thorens', elevation='bot', page_cache=None):
+    """Record a fetched page in the snapshot archive"""
+    if response.status_code == 200:
+        archive.store(resort, elevation, response.content)
+    elif response.status_code == 304 and page_cache:
+        # Nothing was downloaded; point this fetch at the body we already have
+        archive.link(resort, elevation, page_cache.body_hash(forecast_url(resort, elevation)))
+
+def fetch_forecast(resort='Val-Thorens', elevation='bot', page_cache=None):
+    """Fetch forecast data for a specific resort and elevation"""
+    response = fetch_forecast_page(resort, elevation, page_cache)
+    return parse_page(response, resort, elevation, page_cache)
+
+def parse_forecast(html, resort='Val-Thorens', elevation='bot'):
+    """Parse a snow-forecast.com page into the day-by-day forecast structure"""
+    # Only the forecast and snow-depth tables are parsed; the rest of the page is skipped
+    table = extract_forecast_tables(html)
+    if not table:
         return None
     
-    # Extract all data rows
-    days_row = forecast_table.find('tr', {'data-row': 'days'})
-    time_row = forecast_table.find('tr', {'data-row': 'time'})
-    weather_row = forecast_table.find('tr', {'data-row': 'weather'})
-    temp_row = forecast_table.find('tr', {'data-row': 'temperature-max'})
-    snow_row = forecast_table.find('tr', {'data-row': 'snow'})
-    rain_row = forecast_table.find('tr', {'data-row': 'rain'})
-    wind_row = forecast_table.find('tr', {'data-row': 'wind'})
+    result = {
+        # Day/period dicts are only built when the forecast is written out
+        'days': ForecastColumns.from_table(table),
+        'last_updated': datetime.now().isoformat(),
+        'resort': resort,
+        'elevation': elevation
+    }
     
-    # Parse days
-    day_cells = days_row.find_all('td', class_='forecast-table-days__cell')
-    days_info = []
-    for cell in day_cells:
-        day_name_elem = cell.find('div', class_='forecast-table-days__name')
-        day_date_elem = cell.find('div', class_='forecast-table-days__date')
-        if day_name_elem and day_date_elem:
-            days_info.append({
-                'name': day_name_elem.text.strip(),
-                'date': day_date_elem.text.strip()
-            })
+    # Add snow conditions if available
+    if table['snow_conditions']:
+        result['snow_conditions'] = table['snow_conditions']
     
-    # Parse time periods
-    time_cells = time_row.find_all('td')[1:]  # Skip first cell (label)
-    time_periods = [cell.text.strip() for cell in time_cells]
+    return result
+
+class FetchLimiter:
+    """Bounds upstream requests in flight, globally and per host"""
     
-    # Parse weather conditions
-    weather_cells = weather_row.find_all('td', class_='forecast-table__cell')
-    weather_data = []
-    for cell in weather_cells:
-        # Try multiple methods to get weather condition
-        img = cell.find('img')
-        if img and img.has_attr('alt'):
-            weather_data.append(img['alt'])
-        else:
-            condition_elem = cell.find('div', class_='weather-icon')
-            condition = condition_elem.get('title', '') if condition_elem else ''
-            weather_data.append(condition)
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, per_host=PER_HOST_CONCURRENCY):
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._per_host = per_host
+        self._hosts = {}
     
-    # Parse temperatures
-    temp_cells = temp_row.find_all('td', class_='forecast-table__cell')
-    temp_data = []
-    for cell in temp_cells:
-        temp_elem = cell.find('div', class_='temp-value')
-        if temp_elem and temp_elem.has_attr('data-value'):
-            temp_data.append(temp_elem['data-value'])
-        else:
-            temp_data.append(None)
+    def _host_semaphore(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self._per_host)
+        return self._hosts[host]
     
-    # Parse snow
-    snow_cells = snow_row.find_all('td', class_='forecast-table__cell')
-    snow_data = []
-    for cell in snow_cells:
-        snow_val = cell.find('span', class_='snow-amount__value')
-        if snow_val:
-            snow_data.append(snow_val.text.strip())
-        else:
-            snow_data.append('0')
+    async def run(self, url, func, *args, **kwargs):
+        """Run a blocking fetch against url in a worker thread once both limits allow it"""
+        # Take the host slot first so a busy host never pins a global slot
+        async with self._host_semaphore(url):
+            async with self._global:
+                return await asyncio.to_thread(functools.partial(func, *args, **kwargs))
+
+async def _fetch_sources(limiter, openweather_api, page_cache, resort, elevation):
+    """Fetch the snow-forecast.com page and OpenWeather data for one resort/elevation concurrently
+
+    Each source gets its own deadline; a source that misses it comes back as a TimeoutError.
+    """
+    page_fetch = asyncio.wait_for(
+        limiter.run(forecast_url(resort, elevation), fetch_forecast_page, resort, elevation, page_cache),
+        SNOW_FORECAST_DEADLINE
+    )
+    if openweather_api:
+        ow_fetch = asyncio.wait_for(
+            limiter.run(openweather_api.base_url, openweather_api.get_forecast, resort=resort, elevation=elevation),
+            OPENWEATHER_DEADLINE
+        )
+        page, ow_data = await asyncio.gather(page_fetch, ow_fetch, return_exceptions=True)
+    else:
+        page, = await asyncio.gather(page_fetch, return_exceptions=True)
+        ow_data = None
+    return resort, elevation, page, ow_data
+
+async def _fetch_and_parse(limiter, parse_pool, openweather_api, page_cache, archive, resort, elevation):
+    """Fetch one resort/elevation and parse its page on the process pool as soon as it arrives
+
+    The parse result (or the exception it raised) comes back in place of the page.
+    """
+    resort, elevation, page, ow_data = await _fetch_sources(limiter, openweather_api, page_cache, resort, elevation)
+    if isinstance(page, Exception):
+        return resort, elevation, page, ow_data
     
-    # Parse rain
-    rain_cells = rain_row.find_all('td', class_='forecast-table__cell')
-    rain_data = []
-    for cell in rain_cells:
-        rain_val = cell.find('span', class_='rain-amount__value')
-        if rain_val:
-            rain_data.append(rain_val.text.strip())
-        else:
-            rain_data.append('0')
+    if archive:
+        try:
+            archive_page(archive, page, resort, elevation, page_cache)
+        except OSError as e:
+            print(f"  ⚠ Could not archive {resort} - {elevation} page: {e}")
     
-    # Parse wind
-    wind_cells = wind_row.find_all('td', class_='forecast-table__cell')
-    wind_data = []
-    for cell in wind_cells:
-        wind_icon = cell.find('div', class_='wind-icon')
-        if wind_icon and wind_icon.has_attr('data-speed'):
-            speed = wind_icon['data-speed']
-            # Get wind direction from rotation
-            arrow = wind_icon.find('g', class_='wind-icon__arrow')
-            direction = ''
-            if arrow and arrow.has_attr('transform'):
-                transform = arrow['transform']
-                # Extract rotation angle and convert to direction
-                import re
-                match = re.search(r'rotate\((\d+)\)', transform)
-                if match:
-                    angle = int(match.group(1))
-                    # Convert angle to compass direction
-                    directions = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
-                    idx = round(angle / 45) % 8
-                    direction = directions[idx]
-            wind_str = f"{speed} km/h"
-            if direction:
-                wind_str += f" {direction}"
-            wind_data.append(wind_str)
-        else:
-            wind_data.append('')
+    try:
+        # Skipped when the page has not changed
+        forecast_data = await parse_page_in_pool(page, parse_pool, resort, elevation, page_cache)
+    except Exception as e:
+        forecast_data = e
+    return resort, elevation, forecast_data, ow_data
+
+def pool_size(resorts):
+    """Parse workers for a run: one per core, but never more than there are pages"""
+    return max(min(PARSE_WORKERS, sum(len(elevations) for elevations in resorts.values())), 1)
+
+async def fetch_all_forecasts(resorts, openweather_api=None, page_cache=None, archive=None, parse_pool=None,
+                              publisher=None):
+    """Fetch every resort/elevation concurrently, parsing pages across processes as they arrive
+
+    Each elevation is published to data/ through publisher as it arrives.
+    Returns {resort name: forecast_model.Resort} in catalog order.
+    """
+    limiter = FetchLimiter()
+    own_pool = parse_pool is None
+    if own_pool:
+        parse_pool = ParsePool(pool_size(resorts))
+        parse_pool.start()
+    own_publisher = publisher is None
+    if own_publisher:
+        publisher = DataPublisher()
+    tasks = [
+        asyncio.create_task(_fetch_and_parse(limiter, parse_pool, openweather_api, page_cache, archive, resort, elevation))
+        for resort, elevations in resorts.items()
+        for elevation in elevations
+    ]
     
-    # Organize data by days
-    days = []
-    cell_idx = 0
-    for day_info in days_info:
-        day_data = {
-            'name': day_info['name'],
-            'date': day_info['date'],
-            'am': None,
-            'pm': None,
-            'night': None
-        }
-        
-        # Each day has 3 periods: AM, PM, night
-        for period in ['am', 'pm', 'night']:
-            if cell_idx < len(time_periods):
-                day_data[period] = {
-                    'condition': weather_data[cell_idx] if cell_idx < len(weather_data) else '',
-                    'temperature': temp_data[cell_idx] if cell_idx < len(temp_data) else None,
-                    'snow': snow_data[cell_idx] if cell_idx < len(snow_data) else '0',
-                    'rain': rain_data[cell_idx] if cell_idx < len(rain_data) else '0',
-                    'wind': wind_data[cell_idx] if cell_idx < len(wind_data) else ''
-                }
-                cell_idx += 1
-        
-        days.append(day_data)
+    results = {}
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            resort, elevation, forecast_data, ow_data = await next_done
+            print(f"\nFetched {resort} - {elevation}")
+            try:
+                if isinstance(forecast_data, asyncio.TimeoutError):
+                    print(f"  ✗ snow-forecast.com missed its {SNOW_FORECAST_DEADLINE:g}s deadline")
+                    continue
+                if isinstance(forecast_data, Exception):
+                    raise forecast_data
+            
+                # Combine with OpenWeather if it came back
+                if isinstance(ow_data, asyncio.TimeoutError):
+                    print(f"  ⚠ OpenWeather missed its {OPENWEATHER_DEADLINE:g}s deadline, using snow-forecast.com only")
+                elif isinstance(ow_data, Exception):
+                    print(f"  ⚠ OpenWeather fetch failed: {ow_data}, using snow-forecast.com only")
+                elif ow_data and forecast_data:
+                    forecast_data = compare_forecasts(forecast_data, ow_data)
+                    print(f"  ✓ Combined data from both sources")
+            
+                if forecast_data and 'days' in forecast_data:
+                    results[(resort, elevation)] = Elevation.from_forecast_data(resort, elevation, forecast_data)
+                
+                    # Save individual file
+                    filename = f"{resort.lower()}-{elevation}.json"
+                    body = to_json_bytes(results[(resort, elevation)], default=json_default)
+                    if publisher.publish(filename, body):
+                        print(f"  ✓ Saved data/{filename}")
+                    else:
+                        print(f"  ✓ data/{filename} unchanged")
+                else:
+                    print(f"  ✗ No data for {resort} - {elevation}")
+                
+            except Exception as e:
+                print(f"  ✗ Error fetching {resort} - {elevation}: {e}")
+                import traceback
+                traceback.print_exception(type(e), e, e.__traceback__)
+    finally:
+        if own_pool:
+            parse_pool.shutdown()
+        if own_publisher:
+            publisher.save()
     
-    result = {
-        'days': days,
-        'last_updated': datetime.now().isoformat(),
-        'resort': resort,
-        'elevation': elevation
+    # Results arrive in completion order; keep the combined file in catalog order
+    return {
+        resort: Resort(resort, {
+            elevation: results[(resort, elevation)]
+            for elevation in elevations
+            if (resort, elevation) in results
+        })
+        for resort, elevations in resorts.items()
     }
-    
-    # Add snow conditions if available
-    if snow_conditions:
-        result['snow_conditions'] = snow_conditions
-    
-    return result
+
+def publish_shards(publisher, all_data):
+    """Publish a shard per resort and per resort/elevation; returns the metadata.json 'shards' listing"""
+    shards = {}
+    for resort, forecast in all_data.items():
+        if not forecast.elevations:
+            continue
+        stem = resort.lower()
+        shards[resort] = {
+            **publisher.publish_shard(stem, to_json_bytes(forecast, default=json_default)),
+            'elevations': {
+                name: publisher.publish_shard(f"{stem}-{name}", to_json_bytes(elevation, default=json_default))
+                for name, elevation in forecast.elevations.items()
+            }
+        }
+    return shards
+
+def shard_files(shards):
+    """Every shard file named in a metadata.json 'shards' listing"""
+    files = set()
+    for entry in shards.values():
+        files.add(entry['file'])
+        files.update(elevation['file'] for elevation in entry.get('elevations', {}).values())
+    return files
 
 def main():
     """Generate forecast data for all resorts and elevations."""
@@ -191,10 +297,7 @@ def main():
     # Create data directory if it doesn't exist
     os.makedirs('data', exist_ok=True)
     
-    resorts = {
-        'Val-Thorens': ['bot', 'mid', 'top'],
-        'Cervinia': ['bot', 'mid', 'top']
-    }
+    resorts = RESORTS
     
     # Initialize OpenWeather API if available
     openweather_api = None
@@ -206,58 +309,64 @@ def main():
         else:
             print("⚠ OPENWEATHER_API_KEY not set, using snow-forecast.com only")
     
-    all_data = {}
+    page_cache = PageCache()
+    archive = SnapshotArchive()
+    publisher = DataPublisher()
+    with ParsePool(pool_size(resorts)) as parse_pool:
+        print(f"✓ Parsing on {parse_pool.workers} worker processes")
+        all_data = asyncio.run(fetch_all_forecasts(resorts, openweather_api, page_cache, archive, parse_pool, publisher))
+    page_cache.save()
+    print(f"\n✓ Page cache: {page_cache.summary()}")
     
-    for resort, elevations in resorts.items():
-        all_data[resort] = {}
-        
-        for elevation in elevations:
-            print(f"\nFetching {resort} - {elevation}...")
-            try:
-                # Fetch from snow-forecast.com
-                forecast_data = fetch_forecast(resort=resort, elevation=elevation)
-                
-                # Try to fetch from OpenWeather and combine
-                if openweather_api and forecast_data:
-                    try:
-                        print(f"  → Fetching OpenWeather data...")
-                        ow_data = openweather_api.get_forecast(resort=resort, elevation=elevation)
-                        if ow_data:
-                            forecast_data = compare_forecasts(forecast_data, ow_data)
-                            print(f"  ✓ Combined data from both sources")
-                    except Exception as e:
-                        print(f"  ⚠ OpenWeather fetch failed: {e}, using snow-forecast.com only")
-                
-                if forecast_data and 'days' in forecast_data:
-                    all_data[resort][elevation] = forecast_data
-                    
-                    # Save individual file
-                    filename = f"data/{resort.lower()}-{elevation}.json"
-                    with open(filename, 'w') as f:
-                        json.dump(forecast_data, f, indent=2, default=str)
-                    print(f"  ✓ Saved {filename}")
-                else:
-                    print(f"  ✗ No data for {resort} - {elevation}")
-                    
-            except Exception as e:
-                print(f"  ✗ Error fetching {resort} - {elevation}: {e}")
-                import traceback
-                traceback.print_exc()
+    try:
+        with ForecastHistory() as history:
+            stored = history.record_run(all_data)
+        print(f"✓ History: {stored} periods stored in {history.path}")
+    except Exception as e:
+        print(f"⚠ Could not record forecast history: {e}")
+    
+    stats = http_client.connection_stats()
+    print(f"✓ HTTP: {stats['requests']} requests over {stats['connections_opened']} connections "
+          f"({stats['connections_reused']} reused)")
     
     # Save combined file
-    with open('data/all-forecasts.json', 'w') as f:
-        json.dump(all_data, f, indent=2, default=str)
-    print("\n✓ Saved data/all-forecasts.json")
+    body = to_json_bytes(all_data, default=json_default)
+    if publisher.publish('all-forecasts.json', body):
+        print("\n✓ Saved data/all-forecasts.json")
+    else:
+        print("\n✓ data/all-forecasts.json unchanged")
     
-    # Create metadata file
+    try:
+        with open(publisher.path('metadata.json'), 'r') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    
+    # Content-hashed shards, so clients only download what changed
+    shards = publish_shards(publisher, all_data)
+    # Keep the previous run's shards too, for clients still holding the old metadata.json
+    removed = publisher.prune_shards(shard_files(shards) | shard_files(previous.get('shards', {})))
+    print(f"✓ Shards: {len(shard_files(shards))} listed, {removed} removed")
+    
+    # metadata.json is the manifest clients poll; its timestamp only moves when some forecast changed
+    last_updated = datetime.now().isoformat()
+    if not publisher.changed:
+        last_updated = previous.get('last_updated') or last_updated
     metadata = {
-        'last_updated': datetime.now().isoformat(),
+        'last_updated': last_updated,
         'resorts': list(resorts.keys()),
-        'elevations': ['bot', 'mid', 'top']
+        'elevations': ['bot', 'mid', 'top'],
+        'all_forecasts': {'file': 'all-forecasts.json', **publisher.entry('all-forecasts.json')},
+        'shards': shards
     }
-    with open('data/metadata.json', 'w') as f:
-        json.dump(metadata, f, indent=2)
-    print("✓ Saved data/metadata.json")
+    if publisher.publish('metadata.json', to_json_bytes(metadata), volatile=()):
+        print("✓ Saved data/metadata.json")
+    else:
+        print("✓ data/metadata.json unchanged")
+    
+    if publisher.save():
+        print("✓ Saved data/manifest.json")
+    print(f"✓ Outputs: {publisher.summary()}")
     
     print("\n✅ All forecast data generated successfully!")
 
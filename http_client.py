@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for all upstream calls
+Owns one pooled requests.Session so connections and TLS sessions are reused
+across snow-forecast.com and OpenWeatherMap requests
+"""
+
+import atexit
+import os
+import threading
+from http.cookiejar import LWPCookieJar
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Number of hosts to keep pools for, and connections kept alive per host
+POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', '10'))
+POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '10'))
+DEFAULT_TIMEOUT = 30
+
+# Cookies set by upstream servers survive between runs in this file
+COOKIE_JAR_PATH = os.environ.get('HTTP_COOKIE_JAR', os.path.join(BASE_DIR, '.cache', 'cookies.txt'))
+
+
+class ConnectionStats:
+    """Thread-safe counters for requests sent and connections opened"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def snapshot(self):
+        with self._lock:
+            requests_sent = self.requests
+            opened = self.connections_opened
+        reused = max(requests_sent - opened, 0)
+        return {
+            'requests': requests_sent,
+            'connections_opened': opened,
+            'connections_reused': reused,
+            'reuse_ratio': round(reused / requests_sent, 3) if requests_sent else 0.0
+        }
+
+
+_stats = ConnectionStats()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _stats.record_connection()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _stats.record_connection()
+        return super()._new_conn()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools report every request and every new connection"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool
+        }
+
+    def send(self, request, **kwargs):
+        _stats.record_request()
+        return super().send(request, **kwargs)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    # urllib3 advertises br (and zstd) only when a decoder is installed
+    session.headers.update({
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'Connection': 'keep-alive'
+    })
+
+    jar = LWPCookieJar(COOKIE_JAR_PATH)
+    if os.path.exists(COOKIE_JAR_PATH):
+        try:
+            jar.load(ignore_discard=True)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not load cookie jar {COOKIE_JAR_PATH}: {e}")
+    session.cookies = jar
+    return session
+
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+                atexit.register(save_cookies)
+    return _session
+
+
+def get(url, **kwargs):
+    """GET url through the shared session (same arguments as requests.get)"""
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    return get_session().get(url, **kwargs)
+
+
+def save_cookies():
+    """Persist the session cookie jar to COOKIE_JAR_PATH"""
+    if _session is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(COOKIE_JAR_PATH), exist_ok=True)
+        _session.cookies.save(ignore_discard=True)
+    except OSError as e:
+        # Read-only filesystems (e.g. serverless) simply keep cookies in memory
+        print(f"⚠ Could not save cookie jar {COOKIE_JAR_PATH}: {e}")
+
+
+def connection_stats():
+    """Return request and connection reuse counters for this process"""
+    return _stats.snapshot()
@@ -7,7 +7,9 @@ Uses the FREE forecast API (no payment required)
 
 import requests
 import os
+import http_client
 from datetime import datetime
+from forecast_columns import as_columns
 
 class OpenWeatherAPI:
     """Integration with OpenWeatherMap Free 5-Day Forecast API"""
@@ -37,6 +39,16 @@ class OpenWeatherAPI:
         Returns:
             dict: Forecast data with daily snow accumulation, temps, conditions
         """
+        try:
+            data = self.fetch_raw_forecast(resort, elevation)
+            return self._format_forecast(data, resort, elevation)
+            
+        except requests.RequestException as e:
+            print(f"Error fetching OpenWeather data: {e}")
+            return None
+    
+    def fetch_raw_forecast(self, resort='Val-Thorens', elevation='mid'):
+        """Fetch the raw 3-hour forecast JSON from the API, as passed to _format_forecast"""
         if not self.api_key:
             raise ValueError("OpenWeather API key not set. Set OPENWEATHER_API_KEY environment variable.")
         
@@ -52,16 +64,9 @@ class OpenWeatherAPI:
             'cnt': 40  # 40 * 3-hour periods = 5 days
         }
         
-        try:
-            response = requests.get(self.base_url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            return self._format_forecast(data, resort, elevation)
-            
-        except requests.RequestException as e:
-            print(f"Error fetching OpenWeather data: {e}")
-            return None
+        response = http_client.get(self.base_url, params=params, timeout=30)
+        response.raise_for_status()
+        return response.json()
     
     def _format_forecast(self, data, resort, elevation):
         """Format OpenWeather 5-day forecast data to match our app structure"""
@@ -120,8 +125,8 @@ class OpenWeatherAPI:
         for date_key in sorted(daily_data.keys())[:7]:  # Max 7 days to match snow-forecast
             day = daily_data[date_key]
             
-            # Most common condition
-            condition = max(set(day['conditions']), key=day['conditions'].count) if day['conditions'] else 'N/A'
+            # Most common condition (earliest one on a tie, so the result does not depend on set order)
+            condition = max(day['conditions'], key=day['conditions'].count) if day['conditions'] else 'N/A'
             
             daily_forecasts.append({
                 'date': date_key,
@@ -168,42 +173,37 @@ def compare_forecasts(snow_forecast_data, openweather_data):
     if not openweather_data:
         return snow_forecast_data
     
-    # Match days from both sources
-    combined_days = []
+    days = as_columns(snow_forecast_data.get('days', []))
     
-    for sf_day in snow_forecast_data.get('days', []):
-        # Find matching day in OpenWeather data
-        ow_day = None
-        for ow in openweather_data.get('daily', []):
-            if ow['day_short'] == sf_day['name'][:3]:  # Match by day name
-                ow_day = ow
-                break
-        
+    # Total snow (AM + PM + Night) per day from snow-forecast.com, summed straight from the snow column
+    sf_totals = days.day_totals('snow').tolist()
+    
+    # Match days from both sources by day name
+    ow_days = {}
+    for ow in openweather_data.get('daily', []):
+        ow_days.setdefault(ow['day_short'], ow)
+    
+    extras = []
+    for sf_day, sf_total_snow in zip(days.days, sf_totals):
+        ow_day = ow_days.get(sf_day['name'][:3])
         if ow_day:
-            # Calculate average snow from AM + PM + Night from snow-forecast
-            sf_total_snow = 0
-            for period in ['am', 'pm', 'night']:
-                if sf_day.get(period):
-                    sf_total_snow += float(sf_day[period].get('snow', 0) or 0)
-            
             ow_snow = ow_day['snow_cm']
             
             # Average the two sources
             avg_snow = round((sf_total_snow + ow_snow) / 2, 1)
             
-            combined_days.append({
-                **sf_day,
+            extras.append({
                 'snow_forecast_com': sf_total_snow,
                 'openweather': ow_snow,
                 'average_snow': avg_snow,
                 'openweather_details': ow_day
             })
         else:
-            combined_days.append(sf_day)
+            extras.append(None)
     
     return {
         **snow_forecast_data,
-        'days': combined_days,
+        'days': days.with_day_extras(extras),
         'sources': ['snow-forecast.com', 'OpenWeatherMap']
     }
 
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Revalidation cache for snow-forecast.com pages
+Remembers each page's ETag/Last-Modified, body hash and parsed result so an
+unchanged page is never parsed twice. Parsed forecasts are stored as
+ForecastColumns records, so a cache hit yields exactly the columns a fresh
+parse would
+"""
+
+import hashlib
+import json
+import os
+
+from forecast_columns import ForecastColumns, json_default
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGE_CACHE_PATH = os.environ.get('FORECAST_PAGE_CACHE', os.path.join(BASE_DIR, '.cache', 'forecast-pages.json'))
+
+# Entries written in any other format (e.g. published day dicts) are ignored and re-fetched
+ENTRY_FORMAT = 2
+
+
+class PageCache:
+    """Conditional-GET validators plus parsed results, keyed by page URL"""
+
+    def __init__(self, path=PAGE_CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        self.revalidated = 0  # 304 Not Modified
+        self.unchanged = 0    # 200 with the same body hash
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        """Load cached entries from disk, starting empty if the file is missing or corrupt"""
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except (OSError, ValueError) as e:
+            print(f"⚠ Ignoring unreadable page cache {self.path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        """Write cached entries back to disk"""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w') as f:
+                json.dump(self.entries, f, default=json_default)
+        except OSError as e:
+            print(f"⚠ Could not save page cache {self.path}: {e}")
+
+    def _entry(self, url):
+        """The usable cache entry for url, or None"""
+        entry = self.entries.get(url)
+        if not entry or entry.get('format') != ENTRY_FORMAT or entry.get('parsed') is None:
+            return None
+        return entry
+
+    def validators(self, url):
+        """Return If-None-Match / If-Modified-Since headers for url, if known"""
+        entry = self._entry(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def body_hash(self, url):
+        """Return the SHA-256 of the last body seen for url, if any"""
+        entry = self._entry(url)
+        return entry.get('sha256') if entry else None
+
+    def lookup(self, url, response):
+        """Return the cached parsed result if response shows the page is unchanged, else None"""
+        entry = self._entry(url)
+        if not entry:
+            self.misses += 1
+            return None
+
+        if response.status_code == 304:
+            self.revalidated += 1
+            return _restore(entry['parsed'])
+
+        if response.status_code == 200 and _body_hash(response.content) == entry.get('sha256'):
+            # Server ignored our validators but sent the same bytes; refresh them for next time
+            self._update_validators(entry, response)
+            self.unchanged += 1
+            return _restore(entry['parsed'])
+
+        self.misses += 1
+        return None
+
+    def store(self, url, response, parsed):
+        """Remember validators, body hash and parsed result for a freshly parsed 200 response"""
+        if response.status_code != 200 or parsed is None:
+            return
+        entry = {'format': ENTRY_FORMAT, 'sha256': _body_hash(response.content), 'parsed': _record(parsed)}
+        self._update_validators(entry, response)
+        self.entries[url] = entry
+
+    def _update_validators(self, entry, response):
+        entry['etag'] = response.headers.get('ETag')
+        entry['last_modified'] = response.headers.get('Last-Modified')
+
+    def summary(self):
+        hits = self.revalidated + self.unchanged
+        return (f"{hits} hits ({self.revalidated} not modified, {self.unchanged} unchanged body), "
+                f"{self.misses} misses")
+
+
+def _record(parsed):
+    """parsed with its ForecastColumns in record form, for storing as JSON"""
+    return {**parsed, 'days': parsed['days'].to_record()}
+
+
+def _restore(stored):
+    """A stored parse with its ForecastColumns rebuilt"""
+    return {**stored, 'days': ForecastColumns.from_record(stored['days'])}
+
+
+def _body_hash(body):
+    return hashlib.sha256(body).hexdigest()
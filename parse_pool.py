@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Process pool for CPU-bound page parsing
+Fetching stays I/O-concurrent (threads or asyncio) while the raw page bytes are
+parsed on one worker process per core, outside the GIL
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+PARSE_WORKERS = int(os.environ.get('FORECAST_PARSE_WORKERS', '0')) or os.cpu_count() or 1
+
+# Callers already run fetch threads, and forking a multi-threaded process can
+# deadlock the child on a lock held by another thread; forkserver workers are
+# forked from a clean single-threaded server instead
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class ParsePool:
+    """ProcessPoolExecutor for module-level parse functions
+
+    Each job is func(body, *args) where body is the raw page bytes; func must
+    be picklable (defined at module level) and should return a compact result
+    (plain dicts/lists or NumPy arrays) since it is sent back between
+    processes. The executor starts on entering the pool (or on the first
+    submit), so enter it before starting any fetch threads.
+    """
+
+    def __init__(self, workers=PARSE_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self.submitted = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def submit(self, func, body, *args):
+        """Queue func(body, *args) on a worker process and return its Future"""
+        self.start()
+        self.submitted += 1
+        return self._executor.submit(func, body, *args)
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context(START_METHOD))
+
+    async def run(self, func, body, *args):
+        """Awaitable submit() for use from an asyncio event loop"""
+        return await asyncio.wrap_future(self.submit(func, body, *args))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Read-through access to the forecasts precomputed by generate_static_data.py
+Keeps data/{resort}-{elevation}.json in memory and reloads a file only when
+its mtime changes, or reads it from a data_plane.DataPlane when given one.
+A file's age counts from the last generator run that published it or found it
+unchanged (its checked_at in data/manifest.json), falling back to the file's
+own last_updated stamp. File mtimes are never used for age: a deploy from git
+resets them all
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from published_data import CHECKED_KEY, MANIFEST_NAME
+
+
+class PrecomputedStore:
+    """In-memory copy of the per-resort/elevation files in data_dir"""
+
+    def __init__(self, data_dir, max_age=4 * 3600, check_interval=5, data_plane=None):
+        self.data_dir = data_dir
+        self.data_plane = data_plane
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self._files = {}  # path -> {'mtime', 'checked_at', 'data'}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.served = 0
+        self.stale = 0
+        self.missing = 0
+
+    def path_for(self, resort, elevation):
+        return os.path.join(self.data_dir, f"{resort.lower()}-{elevation}.json")
+
+    def load(self, path):
+        """Return the parsed file at path, re-reading it only if its mtime changed"""
+        if self.data_plane is not None:
+            artifact = self.data_plane.get_path(path)
+            try:
+                return artifact.json() if artifact else None
+            except ValueError as e:
+                print(f"⚠ Could not load precomputed forecast {path}: {e}")
+                return None
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._files.get(path)
+            if cached and now - cached['checked_at'] < self.check_interval:
+                return cached['data']
+
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            with self._lock:
+                self._files.pop(path, None)
+            return None
+
+        if cached and cached['mtime'] == mtime:
+            with self._lock:
+                cached['checked_at'] = now
+            return cached['data']
+
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not load precomputed forecast {path}: {e}")
+            return cached['data'] if cached else None
+
+        with self._lock:
+            self._files[path] = {'mtime': mtime, 'checked_at': now, 'data': data}
+            self.loads += 1
+        return data
+
+    def age_seconds(self, path, data):
+        """Seconds since the generator last published or verified the file at path, or None"""
+        manifest = self.load(os.path.join(self.data_dir, MANIFEST_NAME)) or {}
+        entry = manifest.get(os.path.relpath(path, self.data_dir).replace(os.sep, '/')) or {}
+        try:
+            checked_at = datetime.strptime(entry[CHECKED_KEY], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+            return (datetime.now(timezone.utc) - checked_at).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            pass
+        try:
+            return (datetime.now() - datetime.fromisoformat(data['last_updated'])).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def get_fresh(self, resort, elevation):
+        """Return the precomputed forecast if it exists and is newer than max_age, else None"""
+        path = self.path_for(resort, elevation)
+        data = self.load(path)
+        if data is None:
+            with self._lock:
+                self.missing += 1
+            return None
+
+        age = self.age_seconds(path, data)
+        if age is None or age > self.max_age:
+            with self._lock:
+                self.stale += 1
+            return None
+
+        with self._lock:
+            self.served += 1
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {
+                'files_loaded': len(self._files),
+                'loads': self.loads,
+                'served': self.served,
+                'stale': self.stale,
+                'missing': self.missing,
+                'max_age': self.max_age
+            }
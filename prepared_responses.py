@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Ready-to-send response bodies
+Each body is built once per content version, with its strong ETag and
+compressed variants: files when data_plane loads a new version, and in-memory
+response values (precomputed or cached forecasts) once per object. Request
+handlers then only pick which bytes to send
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from published_data import ENCODINGS, compressed_variants, decompress
+
+# Smaller bodies are sent uncompressed; the encoding overhead outweighs the saving
+MIN_COMPRESS_SIZE = 1024
+
+
+def strong_etag(body):
+    """Unquoted strong ETag for a response body"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+class PreparedBody:
+    """One response body with its ETag and {Content-Encoding: compressed body} variants"""
+
+    __slots__ = ('body', 'etag', 'variants')
+
+    def __init__(self, body, variants=None):
+        self.body = body
+        self.etag = strong_etag(body)
+        self.variants = variants or {}
+
+    @classmethod
+    def compressed(cls, body):
+        """Prepare body, compressing it now if it is large enough to be worth it"""
+        return cls(body, compressed_variants(body) if len(body) >= MIN_COMPRESS_SIZE else {})
+
+    def encoded(self, encoding=None):
+        """(bytes, ETag) to send for a Content-Encoding, or for identity when encoding is None
+
+        Each encoding gets its own strong ETag, since the bytes differ.
+        """
+        if encoding is None:
+            return self.body, self.etag
+        return self.variants[encoding], f"{self.etag}-{encoding}"
+
+    def __len__(self):
+        return len(self.body)
+
+
+def prepare_file(f, precompressed=False):
+    """PreparedBody of an open binary file
+
+    With precompressed, the variants are the .br/.gz siblings written by
+    published_data instead of being compressed here. A sibling is only used if
+    it decompresses to this body, so a sibling caught mid-update is dropped.
+    """
+    body = f.read()
+    if not precompressed:
+        return PreparedBody.compressed(body)
+    variants = {}
+    for encoding, suffix in ENCODINGS.items():
+        try:
+            with open(f.name + suffix, 'rb') as sibling:
+                compressed = sibling.read()
+        except FileNotFoundError:
+            continue
+        if decompress(compressed, encoding) == body:
+            variants[encoding] = compressed
+    return PreparedBody(body, variants)
+
+
+class PreparedValues:
+    """Prepared bodies of in-memory response values, built once per value object
+
+    Precomputed and cached forecasts are the same object until their content
+    changes, so the object itself identifies the content version. A reference
+    is kept to each value so its id cannot be reused while it is cached.
+    """
+
+    def __init__(self, serialize, maxsize=64):
+        self.serialize = serialize
+        self.maxsize = maxsize
+        self._values = OrderedDict()  # id(value) -> (value, PreparedBody)
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get(self, value):
+        key = id(value)
+        with self._lock:
+            cached = self._values.get(key)
+            if cached and cached[0] is value:
+                self._values.move_to_end(key)
+                return cached[1]
+
+        prepared = PreparedBody.compressed(self.serialize(value))
+        with self._lock:
+            self._values[key] = (value, prepared)
+            self._values.move_to_end(key)
+            while len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+            self.builds += 1
+        return prepared
+
+    def stats(self):
+        with self._lock:
+            return {'values': len(self._values), 'builds': self.builds}
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Change-detected, atomic writes of the files published in data/
+Each output's content hash is kept in data/manifest.json. A file is only
+rewritten when its content changed, and always through a temp file plus
+rename, so readers never see a half-written file. Every output gets
+precompressed .gz and .br siblings so servers never compress per request.
+The manifest also records when each output was last published or found
+unchanged (checked_at), since an unchanged file keeps its old last_updated
+stamp and a deployed checkout's mtimes say nothing about either
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+# Brotli is in requirements.txt; without it only .gz siblings are written
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+DATA_DIR = 'data'
+MANIFEST_NAME = 'manifest.json'
+SHARD_DIR = 'shards'
+
+# Content-Encoding -> sibling file suffix, in order of preference
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+# Stamped on every run; a change to these alone does not count as new content
+VOLATILE_KEYS = ('last_updated',)
+
+# Manifest entry key for the UTC time an output was last published or confirmed unchanged
+CHECKED_KEY = 'checked_at'
+
+
+def write_atomic(path, body):
+    """Replace path with body (bytes) so readers see either the old or the new file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def to_json_bytes(value, default=None):
+    """Minified UTF-8 JSON body for a published file"""
+    return json.dumps(value, separators=(',', ':'), default=default).encode('utf-8')
+
+
+def compressed_variants(body):
+    """{Content-Encoding: compressed body} for every encoding available here"""
+    variants = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if BROTLI_AVAILABLE:
+        variants['br'] = brotli.compress(body, quality=11, mode=brotli.MODE_TEXT)
+    return {encoding: variants[encoding] for encoding in ENCODINGS if encoding in variants}
+
+
+def decompress(compressed, encoding):
+    """Decoded body of a compressed variant, or None if it cannot be decoded here"""
+    try:
+        if encoding == 'gzip':
+            return gzip.decompress(compressed)
+        if encoding == 'br' and BROTLI_AVAILABLE:
+            return brotli.decompress(compressed)
+    except Exception:
+        return None
+    return None
+
+
+def content_hash(body, volatile=VOLATILE_KEYS):
+    """SHA-256 of a JSON body's content, ignoring formatting and the volatile keys"""
+    def strip(item):
+        if isinstance(item, dict):
+            return {key: strip(value) for key, value in item.items() if key not in volatile}
+        if isinstance(item, list):
+            return [strip(value) for value in item]
+        return item
+    try:
+        canonical = json.dumps(strip(json.loads(body)), sort_keys=True, separators=(',', ':'))
+    except ValueError:
+        return hashlib.sha256(body).hexdigest()
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class DataPublisher:
+    """Writes outputs into data_dir, skipping those whose content hash is unchanged"""
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.manifest_path = os.path.join(data_dir, MANIFEST_NAME)
+        self.written = []
+        self.unchanged = []
+        self.checked_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self._dirty = False
+        try:
+            with open(self.manifest_path, 'r') as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+        except (OSError, ValueError) as e:
+            print(f"⚠ Ignoring unreadable manifest {self.manifest_path}: {e}")
+            self.manifest = {}
+
+    @property
+    def changed(self):
+        return bool(self.written)
+
+    def path(self, name):
+        return os.path.join(self.data_dir, name)
+
+    def entry(self, name):
+        """Manifest entry of a published output without its checked_at time, for listing in metadata"""
+        return {key: value for key, value in self.manifest[name].items() if key != CHECKED_KEY}
+
+    def _is_current(self, name, sha256, encodings):
+        """True if data_dir/name and all its compressed siblings already hold this content"""
+        entry = self.manifest.get(name)
+        if not entry or entry['sha256'] != sha256 or sorted(entry.get('encodings', {})) != sorted(encodings):
+            return False
+        paths = [self.path(name)] + [self.path(name) + ENCODINGS[encoding] for encoding in encodings]
+        return all(os.path.exists(path) for path in paths)
+
+    def publish(self, name, body, volatile=VOLATILE_KEYS):
+        """Write body (bytes) and its compressed siblings unless the content is unchanged
+
+        Returns True if the files were written.
+        """
+        sha256 = content_hash(body, volatile)
+        encodings = [encoding for encoding in ENCODINGS if encoding != 'br' or BROTLI_AVAILABLE]
+        if self._is_current(name, sha256, encodings):
+            self.unchanged.append(name)
+            self.manifest[name][CHECKED_KEY] = self.checked_at
+            self._dirty = True
+            return False
+
+        variants = compressed_variants(body)
+        # Siblings first, so a reader that sees the new plain file also finds new siblings
+        for encoding, compressed in variants.items():
+            write_atomic(self.path(name) + ENCODINGS[encoding], compressed)
+        write_atomic(self.path(name), body)
+        self.manifest[name] = {
+            'sha256': sha256,
+            'bytes': len(body),
+            'encodings': {encoding: len(compressed) for encoding, compressed in variants.items()},
+            CHECKED_KEY: self.checked_at
+        }
+        self._dirty = True
+        self.written.append(name)
+        return True
+
+    def publish_shard(self, stem, body):
+        """Publish body as shards/<stem>.<content hash>.json and return its metadata entry
+
+        The name changes whenever the content does, so a shard's bytes never
+        change once published and clients can cache it indefinitely.
+        """
+        name = f"{SHARD_DIR}/{stem}.{content_hash(body)[:16]}.json"
+        self.publish(name, body)
+        return {'file': name, **self.entry(name)}
+
+    def prune_shards(self, keep):
+        """Delete published shards, and their siblings, whose names are not in keep"""
+        stale = [name for name in self.manifest if name.startswith(SHARD_DIR + '/') and name not in keep]
+        for name in stale:
+            for path in [self.path(name)] + [self.path(name) + suffix for suffix in ENCODINGS.values()]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            del self.manifest[name]
+            self._dirty = True
+        return len(stale)
+
+    def save(self):
+        """Write the manifest if any entry changed"""
+        if not self._dirty:
+            return False
+        body = json.dumps(self.manifest, indent=2, sort_keys=True) + '\n'
+        write_atomic(self.manifest_path, body.encode('utf-8'))
+        self._dirty = False
+        return True
+
+    def summary(self):
+        return f"{len(self.written)} written, {len(self.unchanged)} unchanged"
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Background job queue for the /api/refresh endpoints
+A refresh is queued and answered with a job id straight away; a small worker
+pool runs it. Requesting a refresh that is already queued or running, or
+that finished less than a cooldown ago, returns the existing job, so each
+key runs at most once per cooldown however often it is requested
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class Job:
+    """One queued refresh and its outcome"""
+
+    __slots__ = ('id', 'key', 'status', 'submitted_at', 'started_at', 'finished_at',
+                 'result', 'error', 'finished')
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'  # queued -> running -> succeeded | failed
+        self.submitted_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.finished = threading.Event()
+
+    def to_json(self):
+        return {
+            'id': self.id,
+            'job': self.key,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """Deduplicated jobs run on a bounded thread pool, with status kept by job id
+
+    A key's job is reused while it is queued or running and for `cooldown`
+    seconds after it finishes. The last `keep` finished jobs stay queryable.
+    """
+
+    def __init__(self, workers=2, cooldown=60, keep=100):
+        self.workers = workers
+        self.cooldown = cooldown
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='refresh-job')
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # id -> Job, oldest first
+        self._active = {}  # key -> Job still queued or running
+        self._finished = {}  # key -> (Job, monotonic finish time) of its latest finished job
+        self.submitted = 0
+        self.deduplicated = 0
+        self.cooled_down = 0
+        self.failures = 0
+
+    def submit(self, key, func, *args):
+        """Queue func(*args) as job `key`, or return the job pending or just finished for key
+
+        Returns (job, created). func's return value becomes the job's result.
+        """
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                self.deduplicated += 1
+                return job, False
+            job, finished = self._finished.get(key, (None, None))
+            if job is not None and time.monotonic() - finished < self.cooldown:
+                self.cooled_down += 1
+                return job, False
+            job = Job(key)
+            self._active[key] = job
+            self._jobs[job.id] = job
+            self.submitted += 1
+        self._executor.submit(self._run, job, func, args)
+        return job, True
+
+    def _run(self, job, func, args):
+        job.status = 'running'
+        job.started_at = _now()
+        started = time.monotonic()
+        try:
+            job.result = func(*args)
+            job.status = 'succeeded'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            with self._lock:
+                self.failures += 1
+            print(f"⚠ Refresh job {job.key} failed: {e}")
+        job.finished_at = _now()
+        print(f"✓ Refresh job {job.key} {job.status} in {time.monotonic() - started:.1f}s")
+        with self._lock:
+            del self._active[job.key]
+            self._finished[job.key] = (job, time.monotonic())
+            self._trim()
+        job.finished.set()
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(len(finished) - self.keep, 0)]:
+            del self._jobs[job_id]
+
+    def cooldown_left(self, job):
+        """Seconds until job's key may run again, 0 once it can"""
+        with self._lock:
+            latest, finished = self._finished.get(job.key, (None, None))
+        if latest is not job:
+            return 0
+        return max(self.cooldown - (time.monotonic() - finished), 0)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'pending': len(self._active),
+                'cooldown': self.cooldown,
+                'submitted': self.submitted,
+                'deduplicated': self.deduplicated,
+                'cooled_down': self.cooled_down,
+                'failures': self.failures
+            }
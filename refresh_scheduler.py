@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Background refresh scheduler for the Flask app
+Rebuilds each resort/elevation cache entry shortly before it expires so
+request threads never pay the scrape cost
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+
+
+class RefreshScheduler:
+    """Single daemon thread that refreshes ForecastCache entries ahead of expiry
+
+    Each key is refreshed lead_time seconds (minus up to jitter seconds of
+    random spread) before its entry expires. Failed refreshes are retried
+    after retry_delay seconds.
+    """
+
+    def __init__(self, cache, loader, keys, lead_time=60, jitter=30, retry_delay=120):
+        self.cache = cache
+        self.loader = loader
+        self.keys = list(keys)
+        self.lead_time = lead_time
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self._queue = []  # heap of (due monotonic time, sequence, key)
+        self._sequence = itertools.count()
+        self._wakeup = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.current = None
+        self.refreshes = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_error = None
+
+    def start(self):
+        """Queue every key (spread over the jitter window) and start the worker thread"""
+        if self._thread is not None:
+            return
+        now = time.monotonic()
+        with self._wakeup:
+            for key in self.keys:
+                self._push(self._due_time(key, now, warm_up=True), key)
+        self._thread = threading.Thread(target=self._run, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+        print(f"✓ Refresh scheduler started for {len(self.keys)} forecasts")
+
+    def stop(self):
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _push(self, due, key):
+        heapq.heappush(self._queue, (due, next(self._sequence), key))
+
+    def _due_time(self, key, now, warm_up=False):
+        expires_in = self.cache.expires_in(key)
+        if expires_in is None:
+            # Nothing cached yet: warm it up soon, staggered so keys do not all fire at once
+            return now + random.uniform(0, self.jitter) if warm_up else now
+        return now + max(expires_in - self.lead_time - random.uniform(0, self.jitter), 0)
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._stopping:
+                    wait = self._queue[0][0] - time.monotonic() if self._queue else None
+                    if wait is not None and wait <= 0:
+                        break
+                    self._wakeup.wait(wait)
+                if self._stopping:
+                    return
+                _, _, key = heapq.heappop(self._queue)
+                self.current = key
+
+            now = time.monotonic()
+            expires_in = self.cache.expires_in(key)
+            if expires_in is not None and expires_in > self.lead_time + self.jitter:
+                # A request-path miss refreshed this entry since it was queued
+                self.skipped += 1
+                due = self._due_time(key, now)
+            else:
+                due = self._refresh(key, now)
+
+            with self._wakeup:
+                self.current = None
+                self._push(due, key)
+
+    def _refresh(self, key, now):
+        try:
+            if self.cache.refresh(key, self.loader, *key) is None:
+                raise ValueError("loader returned no data")
+            self.refreshes += 1
+            return self._due_time(key, time.monotonic())
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{key}: {e}"
+            print(f"⚠ Scheduled refresh of {key} failed: {e}")
+            return now + self.retry_delay
+
+    def state(self):
+        """Queue contents and counters, for the status endpoint"""
+        now = time.monotonic()
+        with self._wakeup:
+            queue = sorted(self._queue)
+            current = self.current
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'refreshing': list(current) if current else None,
+            'queue': [
+                {'resort': key[0], 'elevation': key[1], 'due_in': round(due - now, 1)}
+                for due, _, key in queue
+            ],
+            'refreshes': self.refreshes,
+            'skipped': self.skipped,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'lead_time': self.lead_time,
+            'jitter': self.jitter
+        }
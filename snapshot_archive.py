@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Compressed archive of raw snow-forecast.com pages
+Every fetched page is stored once by content hash, with an index of which
+resort/elevation served it and when, so parsers can be replayed over history
+
+Usage:
+    python snapshot_archive.py list [--since ISO] [--until ISO] [--resort R] [--elevation E]
+    python snapshot_archive.py replay [--since ISO] [--until ISO] [--resort R] [--elevation E]
+                                      [--workers N] [--output DIR]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from forecast_columns import json_default
+
+# zstd compresses HTML better and faster; fall back to gzip when it is not installed
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCHIVE_DIR = os.environ.get('FORECAST_ARCHIVE_DIR', os.path.join(BASE_DIR, '.cache', 'snapshots'))
+
+CODEC_EXTENSIONS = {'zstd': '.html.zst', 'gzip': '.html.gz'}
+
+
+def _compress(body, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(body)
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def _decompress(blob, codec):
+    if codec == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Snapshot is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return gzip.decompress(blob)
+
+
+def _parse_time(value):
+    """Parse an ISO date/datetime as naive UTC"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class SnapshotArchive:
+    """Content-addressed page store plus an append-only JSON-lines index"""
+
+    def __init__(self, root=ARCHIVE_DIR, codec=None):
+        self.root = root
+        self.codec = codec or ('zstd' if ZSTD_AVAILABLE else 'gzip')
+        self.index_path = os.path.join(root, 'index.jsonl')
+        self._lock = threading.Lock()
+
+    def _object_path(self, sha256, codec):
+        return os.path.join(self.root, 'objects', sha256[:2], sha256 + CODEC_EXTENSIONS[codec])
+
+    def _find_object(self, sha256):
+        for codec in CODEC_EXTENSIONS:
+            path = self._object_path(sha256, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None, None
+
+    def _append_index(self, entry):
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.index_path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def store(self, resort, elevation, body, fetched_at=None):
+        """Archive a page body for resort/elevation; identical bodies share one object"""
+        sha256 = hashlib.sha256(body).hexdigest()
+        path, codec = self._find_object(sha256)
+        if path is None:
+            codec = self.codec
+            path = self._object_path(sha256, codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(_compress(body, codec))
+            os.replace(tmp_path, path)
+
+        self._append_index({
+            'resort': resort,
+            'elevation': elevation,
+            'fetched_at': fetched_at or datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'sha256': sha256,
+            'codec': codec,
+            'size': len(body)
+        })
+        return sha256
+
+    def link(self, resort, elevation, sha256, fetched_at=None):
+        """Record a fetch whose body is already archived (e.g. a 304 revalidation)"""
+        path, codec = self._find_object(sha256) if sha256 else (None, None)
+        if path is None:
+            return False
+        self._append_index({
+            'resort': resort,
+            'elevation': elevation,
+            'fetched_at': fetched_at or datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'sha256': sha256,
+            'codec': codec,
+            'size': None
+        })
+        return True
+
+    def snapshots(self, since=None, until=None, resort=None, elevation=None):
+        """Return index entries in [since, until), optionally filtered by resort and elevation"""
+        since = _parse_time(since) if isinstance(since, str) else since
+        until = _parse_time(until) if isinstance(until, str) else until
+        entries = []
+        try:
+            with open(self.index_path, 'r') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if resort and entry['resort'] != resort:
+                        continue
+                    if elevation and entry['elevation'] != elevation:
+                        continue
+                    fetched_at = _parse_time(entry['fetched_at'])
+                    if since and fetched_at < since:
+                        continue
+                    if until and fetched_at >= until:
+                        continue
+                    entries.append(entry)
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def read(self, sha256):
+        """Return the decompressed body for a content hash"""
+        path, codec = self._find_object(sha256)
+        if path is None:
+            raise KeyError(f"Snapshot {sha256} not found in {self.root}")
+        with open(path, 'rb') as f:
+            return _decompress(f.read(), codec)
+
+
+def _replay_one(root, entry):
+    """Process-pool worker: parse one archived page with the production parser"""
+    from generate_static_data import parse_forecast
+
+    body = SnapshotArchive(root).read(entry['sha256'])
+    started = time.perf_counter()
+    result = parse_forecast(body, resort=entry['resort'], elevation=entry['elevation'])
+    elapsed = time.perf_counter() - started
+    if result:
+        result['last_updated'] = entry['fetched_at']
+    return entry, result, elapsed, len(body)
+
+
+def replay(archive, entries, workers=None, output_dir=None):
+    """Re-parse archived snapshots on a process pool, optionally writing each result to output_dir"""
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    parsed = failed = total_bytes = 0
+    parse_seconds = 0.0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_replay_one, archive.root, entry) for entry in entries]
+        for future in futures:
+            try:
+                entry, result, elapsed, size = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"  ✗ Replay failed: {e}")
+                continue
+            parse_seconds += elapsed
+            total_bytes += size
+            if not result:
+                failed += 1
+                print(f"  ✗ No data for {entry['resort']} - {entry['elevation']} @ {entry['fetched_at']}")
+                continue
+            parsed += 1
+            if output_dir:
+                stamp = entry['fetched_at'].replace(':', '').replace('-', '')
+                filename = os.path.join(output_dir, f"{entry['resort'].lower()}-{entry['elevation']}-{stamp}.json")
+                with open(filename, 'w') as f:
+                    json.dump(result, f, indent=2, default=json_default)
+    wall_seconds = time.perf_counter() - started
+
+    return {
+        'snapshots': len(entries),
+        'parsed': parsed,
+        'failed': failed,
+        'wall_seconds': round(wall_seconds, 3),
+        'parse_seconds': round(parse_seconds, 3),
+        'pages_per_second': round(len(entries) / wall_seconds, 1) if wall_seconds else None,
+        'megabytes': round(total_bytes / 1e6, 2)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and replay archived snow-forecast.com pages")
+    parser.add_argument('command', choices=['list', 'replay'])
+    parser.add_argument('--root', default=ARCHIVE_DIR, help="archive directory")
+    parser.add_argument('--since', help="include snapshots fetched at or after this ISO time")
+    parser.add_argument('--until', help="include snapshots fetched before this ISO time")
+    parser.add_argument('--resort')
+    parser.add_argument('--elevation', choices=['bot', 'mid', 'top'])
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="replay processes")
+    parser.add_argument('--output', help="directory for replayed JSON results")
+    args = parser.parse_args(argv)
+
+    archive = SnapshotArchive(args.root)
+    entries = archive.snapshots(args.since, args.until, args.resort, args.elevation)
+
+    if args.command == 'list':
+        for entry in entries:
+            print(f"{entry['fetched_at']}  {entry['resort']:<12} {entry['elevation']:<4} {entry['sha256'][:12]}  {entry['codec']}")
+        print(f"{len(entries)} snapshots")
+        return 0
+
+    print(f"Replaying {len(entries)} snapshots on {args.workers} processes...")
+    summary = replay(archive, entries, workers=args.workers, output_dir=args.output)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
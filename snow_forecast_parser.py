@@ -5,8 +5,8 @@ Fetches and parses snow forecast data from snow-forecast.com
 """
 
 import requests
-import re
-from bs4 import BeautifulSoup
+import http_client
+from forecast_extraction import extract_forecast, cell_at, cell_number
 from datetime import datetime, timedelta
 import json
 
@@ -43,7 +43,7 @@ class SnowForecastParser:
     def fetch_forecast_data(self):
         """Fetch the raw HTML data from the forecast page"""
         try:
-            response = requests.get(self.base_url, headers=self.headers, cookies=self.cookies)
+            response = http_client.get(self.base_url, headers=self.headers, cookies=self.cookies)
             response.raise_for_status()
             return response.text
         except requests.RequestException as e:
@@ -52,7 +52,10 @@ class SnowForecastParser:
     
     def parse_forecast_data(self, html_content):
         """Parse the HTML content and extract forecast information"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        table = extract_forecast(html_content)
+        if not table:
+            print("Could not find forecast table")
+            return None
         
         forecast_data = {
             'resort': 'Val Thorens',
@@ -61,222 +64,37 @@ class SnowForecastParser:
             'forecast_days': []
         }
         
-        # Find the forecast table
-        forecast_table = soup.find('table', class_='forecast-table__table')
-        if not forecast_table:
-            print("Could not find forecast table")
-            return None
-        
-        # Extract time headers (days and hours)
-        time_headers = forecast_table.find('tr', {'data-row': 'time'})
-        if time_headers:
-            time_cells = time_headers.find_all('td', class_='forecast-table__cell')
-            times = []
-            for cell in time_cells:
-                time_text = cell.get_text(strip=True)
-                if time_text and time_text != '—':
-                    times.append(time_text)
-        
-        # Extract weather data for each row type
-        weather_data = {}
-        
-        # Temperature
-        temp_row = forecast_table.find('tr', {'data-row': 'temperature'})
-        if temp_row:
-            temps = self._extract_temperature_data(temp_row)
-            weather_data['temperature'] = temps
-        
-        # Snow depth
-        snow_row = forecast_table.find('tr', {'data-row': 'snow'})
-        if snow_row:
-            snow_depths = self._extract_snow_data(snow_row)
-            weather_data['snow_depth'] = snow_depths
-        
-        # Wind
-        wind_row = forecast_table.find('tr', {'data-row': 'wind'})
-        if wind_row:
-            wind_data = self._extract_wind_data(wind_row)
-            weather_data['wind'] = wind_data
-        
-        # Weather symbols
-        weather_row = forecast_table.find('tr', {'data-row': 'weather'})
-        if weather_row:
-            weather_symbols = self._extract_weather_symbols(weather_row)
-            weather_data['weather'] = weather_symbols
-        
-        # Freezing level
-        freezing_row = forecast_table.find('tr', {'data-row': 'freezing-level'})
-        if freezing_row:
-            freezing_levels = self._extract_data_values(freezing_row, 'level-value')
-            weather_data['freezing_level'] = freezing_levels
-        
-        # Humidity
-        humidity_row = forecast_table.find('tr', {'data-row': 'humidity'})
-        if humidity_row:
-            humidity_data = self._extract_span_data(humidity_row)
-            weather_data['humidity'] = humidity_data
-        
         # Organize data by time periods
-        if times:
-            for i, time in enumerate(times):
-                day_data = {
-                    'time': time,
-                    'temperature': weather_data.get('temperature', [None])[i] if i < len(weather_data.get('temperature', [])) else None,
-                    'snow_depth': weather_data.get('snow_depth', [None])[i] if i < len(weather_data.get('snow_depth', [])) else None,
-                    'wind': weather_data.get('wind', [None])[i] if i < len(weather_data.get('wind', [])) else None,
-                    'weather': weather_data.get('weather', [None])[i] if i < len(weather_data.get('weather', [])) else None,
-                    'freezing_level': weather_data.get('freezing_level', [None])[i] if i < len(weather_data.get('freezing_level', [])) else None,
-                    'humidity': weather_data.get('humidity', [None])[i] if i < len(weather_data.get('humidity', [])) else None,
-                }
-                forecast_data['forecast_days'].append(day_data)
-        
-        # Extract summary text
-        summary_blocks = soup.find_all('p', string=re.compile(r'weather summary:'))
-        summaries = []
-        for block in summary_blocks:
-            parent = block.find_parent()
-            if parent:
-                summary_text = parent.get_text(strip=True)
-                summaries.append(summary_text)
-        
-        forecast_data['summaries'] = summaries
-        
-        # Extract snow conditions
-        snow_conditions = self._extract_snow_conditions(soup)
-        forecast_data['snow_conditions'] = snow_conditions
-        
-        return forecast_data
-    
-    def _extract_data_values(self, row, class_name):
-        """Extract data values from cells with specific class"""
-        values = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            div = cell.find('div', class_=class_name)
-            if div and div.get('data-value'):
-                values.append(float(div['data-value']))
-            else:
-                text = cell.get_text(strip=True)
-                if text and text != '—':
-                    try:
-                        values.append(float(text))
-                    except ValueError:
-                        values.append(text)
-                else:
-                    values.append(None)
-        return values
-    
-    def _extract_temperature_data(self, row):
-        """Extract temperature data specifically"""
-        values = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            # Look for temp-value class with data-value attribute
-            temp_div = cell.find('div', class_=lambda x: x and 'temp-value' in x)
-            if temp_div and temp_div.get('data-value'):
-                values.append(float(temp_div['data-value']))
-            else:
-                # Fallback to text content
-                text = cell.get_text(strip=True)
-                if text and text != '—':
-                    try:
-                        # Remove any non-numeric characters except minus sign
-                        clean_text = re.sub(r'[^\d\-.]', '', text)
-                        if clean_text:
-                            values.append(float(clean_text))
-                        else:
-                            values.append(None)
-                    except ValueError:
-                        values.append(None)
-                else:
-                    values.append(None)
-        return values
-    
-    def _extract_span_data(self, row):
-        """Extract data from span elements"""
-        values = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            span = cell.find('span')
-            if span:
-                text = span.get_text(strip=True)
-                try:
-                    values.append(int(text))
-                except ValueError:
-                    values.append(text)
-            else:
-                values.append(None)
-        return values
-    
-    def _extract_snow_data(self, row):
-        """Extract snow depth data"""
-        values = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            snow_div = cell.find('div', class_='snow-value')
-            if snow_div and snow_div.get('data-value'):
-                values.append(int(snow_div['data-value']))
-            else:
-                text = cell.get_text(strip=True)
-                if text and text != '—':
-                    values.append(text)
-                else:
-                    values.append(None)
-        return values
-    
-    def _extract_wind_data(self, row):
-        """Extract wind data including speed and direction"""
-        wind_data = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            wind_info = {}
-            
-            # Wind speed
-            wind_value = cell.find('div', class_='wind-icon__value')
-            if wind_value:
-                wind_info['speed'] = wind_value.get_text(strip=True)
+        for i, time in enumerate(table['times']):
+            if not time or time == '—':
+                continue
             
-            # Wind direction
-            wind_icon = cell.find('div', class_='wind-icon')
-            if wind_icon and wind_icon.get('data-direction'):
-                wind_info['direction'] = wind_icon['data-direction']
+            condition = cell_at(table['conditions'], i)
+            speed = cell_at(table['wind_speeds'], i)
+            direction = cell_at(table['wind_directions'], i)
+            wind = {}
+            if speed is not None:
+                wind['speed'] = speed
+            if direction is not None:
+                wind['direction'] = direction
             
-            wind_data.append(wind_info if wind_info else None)
-        
-        return wind_data
-    
-    def _extract_weather_symbols(self, row):
-        """Extract weather condition symbols and descriptions"""
-        weather_data = []
-        cells = row.find_all('td', class_='forecast-table__cell')
-        for cell in cells:
-            img = cell.find('img')
-            if img:
-                weather_data.append({
-                    'condition': img.get('alt', ''),
-                    'icon': img.get('src', '')
-                })
-            else:
-                weather_data.append(None)
+            forecast_data['forecast_days'].append({
+                'time': time,
+                'temperature': cell_number(cell_at(table['temperatures'], i), float),
+                'snow_depth': cell_number(cell_at(table['snow'], i), int),
+                'wind': wind or None,
+                'weather': {
+                    'condition': condition,
+                    'icon': cell_at(table['icons'], i) or ''
+                } if condition is not None else None,
+                'freezing_level': cell_number(cell_at(table['freezing_levels'], i), float),
+                'humidity': cell_number(cell_at(table['humidity'], i), int),
+            })
+        
+        forecast_data['summaries'] = table['summaries']
+        forecast_data['snow_conditions'] = table['snow_conditions']
         
-        return weather_data
-    
-    def _extract_snow_conditions(self, soup):
-        """Extract current snow conditions"""
-        conditions = {}
-        
-        snow_table = soup.find('table', class_='snow-depths-table__table')
-        if snow_table:
-            rows = snow_table.find_all('tr')
-            for row in rows:
-                th = row.find('th')
-                td = row.find('td')
-                if th and td:
-                    key = th.get_text(strip=True).replace(':', '')
-                    value = td.get_text(strip=True)
-                    conditions[key] = value
-        
-        return conditions
+        return forecast_data
     
     def get_forecast(self):
         """Main method to get and parse forecast data"""
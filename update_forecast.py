@@ -10,6 +10,7 @@ import json
 import logging
 from datetime import datetime
 from snow_forecast_parser import SnowForecastParser
+from published_data import write_atomic
 
 # Setup logging
 def setup_logging():
@@ -43,8 +44,7 @@ def update_forecast():
         
         # Save to JSON file
         json_file = os.path.join(os.path.dirname(__file__), 'val_thorens_forecast.json')
-        with open(json_file, 'w') as f:
-            json.dump(forecast_data, f, indent=2, default=str)
+        write_atomic(json_file, json.dumps(forecast_data, indent=2, default=str).encode('utf-8'))
         
         # Log success
         snow_conditions = forecast_data.get('snow_conditions', {})